@@ -71,6 +71,7 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("al", "sq", AlSq)
+    dataset.id_column = "idno"
     dataset.data_files = {"settlements": "albania_settlements.json",
                           "municipalities": "albania_municipalities.json"}
     dataset.lookup_downloads = {"is": "al_(sq)/type"}
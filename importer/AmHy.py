@@ -112,6 +112,7 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("am", "hy", AmHy)
+    dataset.id_column = "id"
     dataset.data_files = {
         "communities": "armenia_communities.json",
         "provinces": "armenia_provinces.json"}
@@ -1,4 +1,5 @@
 from Monument import Monument, Dataset
+from KeywordMatcher import KeywordMatcher
 import importer_utils as utils
 import importer as importer
 
@@ -8,6 +9,23 @@ MAPPING_DIR = "mappings"
 
 class AtDe(Monument):
 
+    @classmethod
+    def prepare_data_files(cls, data_files):
+        """
+        Compile the matcher of the monument type keywords.
+
+        It's compiled from the types lookup table once, before any
+        worker processes are forked, and then shared by all the objects
+        of the dataset.
+        """
+        types = data_files["types"]["mappings"]
+        keywords = [x.lower() for x in types.keys()]
+        data_files["_type_matcher"] = KeywordMatcher(keywords)
+
+    def get_type_matcher(self):
+        """Get the matcher of the monument type keywords."""
+        return self.data_files["_type_matcher"]
+
     def get_type_keyword(self):
         """
         Extract type of monument from name.
@@ -17,10 +35,7 @@ class AtDe(Monument):
         https://www.wikidata.org/wiki/Wikidata:WikiProject_WLM/Mapping_tables/at_(de)/types
         """
         raw_name = self.name.lower()
-        types = self.data_files["types"]["mappings"]
-        keywords = list(types.keys())
-        keywords = [x.lower() for x in keywords]
-        return utils.get_longest_match(raw_name, keywords)
+        return self.get_type_matcher().get_longest_match(raw_name)
 
     def set_type(self):
         """
@@ -31,15 +46,14 @@ class AtDe(Monument):
         use the more specific item as P31.
         """
         types = self.data_files["types"]["mappings"]
-        type_match = self.get_type_keyword()
+        type_match = self.type_keyword
         if type_match:
             if isinstance(type_match, list):
                 # multiple matches - report
                 self.add_to_report("type", self.name, "is")
             else:
                 # single match - add
-                match_item = [types[x]["items"]
-                              for x in types if x.lower() == type_match][0][0]
+                match_item = utils.get_items_by_label(type_match, types)[0]
                 self.substitute_statement("is", match_item)
         else:
             # no matches - report
@@ -62,7 +76,7 @@ class AtDe(Monument):
         If specific type in German exists, substitute for $type.
         If municipality name exists, insert it
         """
-        type_match = self.get_type_keyword()
+        type_match = self.type_keyword
         municipality_name = self.get_municipality_name()
         base_desc_german = "{} in {}"
         place_german = "Österreich"
@@ -151,6 +165,7 @@ class AtDe(Monument):
         self.set_monuments_all_id()
         self.set_changed()
         self.wlm_source = self.create_wlm_source(self.monuments_all_id)
+        self.type_keyword = self.get_type_keyword()
         self.update_labels()
         self.set_descriptions()
         self.set_is()
@@ -170,6 +185,8 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("at", "de", AtDe)
+    dataset.id_column = "objektid"
+    dataset.article_columns = ["artikel"]
     dataset.data_files = {"municipalities": "austria_municipalities.json"}
     dataset.lookup_downloads = {"types": "at_(de)/types"}
     importer.main(args, dataset)
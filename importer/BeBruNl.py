@@ -142,6 +142,7 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("be-bru", "nl", BeBruNl)
+    dataset.id_column = "code"
     dataset.data_files = {"municipalities": "belgium_municipalities.json"}
     dataset.lookup_downloads = {"type": "be-bru (nl)/objtype",
                                 "style": "be-bru (nl)/bouwstijl"}
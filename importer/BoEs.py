@@ -83,6 +83,8 @@ if __name__ == "__main__":
     """Command line entry point for importer."""
     args = importer.handle_args()
     dataset = Dataset("bo", "es", BoEs)
+    dataset.id_column = "id"
+    dataset.article_columns = ["monumento_enlace", "monumento"]
     dataset.data_files = {
         "admin": "bolivia_admin.json",  # http://tinyurl.com/y7ffsgou
         "departments": "bolivia_department.json"  # http://tinyurl.com/y9oenz78
@@ -307,6 +307,11 @@ def main(arguments):
     if arguments["short"]:
         print("Using limit: {}.".format(str(arguments["short"])))
         source_data = source_data[:arguments["short"]]
+    if arguments["upload"]:
+        live = True if arguments["upload"] == "live" else False
+        uploader = Uploader(repo=repo,
+                            live=live,
+                            tablename="ba")
     for row in source_data:
         monument = BosniaMonument(row, mapping, data_files, existing, repo)
         if arguments["table"]:
@@ -315,12 +320,7 @@ def main(arguments):
             utils.append_line_to_file(raw_data, filenames['examples'])
             utils.append_line_to_file(monument_table, filenames['examples'])
         if arguments["upload"]:
-            live = True if arguments["upload"] == "live" else False
-            uploader = Uploader(monument,
-                                repo=repo,
-                                live=live,
-                                tablename="ba")
-            uploader.upload()
+            uploader.upload(monument)
 
 
 if __name__ == "__main__":
@@ -138,6 +138,8 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("cl", "es", ClEs)
+    dataset.id_column = "id"
+    dataset.article_columns = ["monumento_enlace", "monumento"]
     dataset.data_files = {
         "municipalities": "chile_municipalities.json",
         "regions": "chile_regions.json"
@@ -63,5 +63,6 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("cm", "fr", CmFr)
+    dataset.id_column = "id"
     dataset.data_files = {"regions": "cameroon_regions.json"}
     importer.main(args, dataset)
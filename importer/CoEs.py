@@ -85,6 +85,8 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("co", "es", CoEs)
+    dataset.id_column = "id"
+    dataset.article_columns = ["monumento_enlace", "monumento"]
     dataset.data_files = {
         "departments": "colombia_departments.json",
     }
@@ -73,12 +73,9 @@ class DkFortidsDa(Monument):
         if self.has_non_empty_attribute("type"):
             table = self.data_files["types"]["mappings"]
             try:
-                special_type = [table[x]["items"]
-                                for x in table
-                                if x == self.type]
-                special_type = special_type[0][0]
+                special_type = table[self.type]["items"][0]
                 self.substitute_statement("is", special_type)
-            except IndexError:
+            except (KeyError, IndexError):
                 self.add_to_report("type", self.type)
 
     def set_monuments_all_id(self):
@@ -119,6 +116,7 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("dk-fortidsminder", "da", DkFortidsDa)
+    dataset.id_column = "systemnummer"
     dataset.data_files = {
         "types": "dk-fortidsminder_(da)_types.json",
         "municipalities": "denmark_municipalities.json"}
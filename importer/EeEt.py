@@ -36,16 +36,11 @@ class EeEt(Monument):
         if self.has_non_empty_attribute("liik"):
             special_heritage = self.liik.lower()
             glossary = self.data_files["heritage_types"]["mappings"]
-            try:
-                heritage = [glossary[x]["items"]
-                            for x in glossary
-                            if x.lower() == special_heritage]
-                if len(heritage[0]) > 0:
-                    self.remove_statement("heritage_status")
-                    for typ in heritage[0]:
-                        self.add_statement("heritage_status", typ)
-            except IndexError:
-                return
+            heritage = utils.get_items_by_label(special_heritage, glossary)
+            if heritage:
+                self.remove_statement("heritage_status")
+                for typ in heritage:
+                    self.add_statement("heritage_status", typ)
 
     def set_heritage_id(self):
         """Set Estonian cultural monument ID (P2948)."""
@@ -137,6 +132,7 @@ if __name__ == "__main__":
     """Command line entry point for importer."""
     args = importer.handle_args()
     dataset = Dataset("ee", "et", EeEt)
+    dataset.id_column = "number"
     dataset.data_files = {
         "municipalities": "estonia_municipalities.json",
         "settlements": "estonia_settlements.json",
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent cache of the claims of Wikidata items.
+
+The claims are stored in simplified form, i.e. as lists of item IDs or
+strings per property, in a SQLite database which is shared by all the
+runs and datasets. Each entry also records the revision of the item it
+was taken from, so that expired entries can be revalidated without
+downloading the whole item again.
+"""
+import json
+import time
+
+try:
+    from SqliteDatabase import SqliteDatabase
+except ImportError:  # imported as part of the importer package
+    from importer.SqliteDatabase import SqliteDatabase
+
+DEFAULT_TTL = 7 * 24 * 60 * 60  # one week, in seconds
+SCHEMA = ("CREATE TABLE IF NOT EXISTS entities ("
+          "qid TEXT PRIMARY KEY, "
+          "revision INTEGER, "
+          "fetched REAL, "
+          "claims TEXT)")
+
+
+class EntityCache(object):
+    """A SQLite backed cache of simplified claims of Wikidata items."""
+
+    def get(self, qid):
+        """
+        Get the cached entry of an item.
+
+        :param qid: ID of the item
+        :return: a dict with the revision, the time it was fetched and the
+            claims, or None if the item is not cached
+        """
+        row = self.database.fetchone(
+            "SELECT revision, fetched, claims FROM entities "
+            "WHERE qid = ?", (qid,))
+        if row is None:
+            return None
+        return {"revision": row[0],
+                "fetched": row[1],
+                "claims": json.loads(row[2])}
+
+    def is_expired(self, entry):
+        """Check whether a cached entry is older than the time to live."""
+        return time.time() - entry["fetched"] > self.ttl
+
+    def put(self, qid, revision, claims):
+        """
+        Store the claims of an item.
+
+        :param qid: ID of the item
+        :param revision: ID of the revision the claims were taken from,
+            None if the item does not exist
+        :param claims: dict of property ID to list of values, or to None
+            if the values of the property cannot be cached
+        """
+        self.database.execute(
+            "INSERT OR REPLACE INTO entities VALUES (?, ?, ?, ?)",
+            (qid, revision, time.time(), json.dumps(claims)))
+
+    def touch(self, qid):
+        """Mark a cached entry as still up to date."""
+        self.database.execute(
+            "UPDATE entities SET fetched = ? WHERE qid = ?",
+            (time.time(), qid))
+
+    def close(self):
+        """Close the database connection."""
+        self.database.close()
+
+    def __init__(self, filename, ttl=DEFAULT_TTL):
+        """
+        Initialize the cache.
+
+        :param filename: path to the SQLite database, created if needed
+        :param ttl: number of seconds after which an entry is revalidated
+        """
+        self.filename = filename
+        self.ttl = ttl
+        # a cache can afford to lose its latest writes
+        self.database = SqliteDatabase(filename, SCHEMA, synchronous="NORMAL")
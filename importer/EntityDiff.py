@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Difference between the planned data of a monument and its item.
+
+Collects what an item lacks, so that it can be added in a single
+wbeditentity call. Labels are only set in languages that don't have one,
+other texts become aliases. Values the item already has get the
+qualifiers and reference added to the existing claim if missing, other
+values become new claims.
+
+The claims are handled through their pywikibot.Claim interface, but
+made and copied by the functions given, so that the comparison doesn't
+depend on a connection to the repository.
+"""
+
+
+class EntityDiff(object):
+    """The changes to make to an item, as sent with wbeditentity."""
+
+    def add_labels(self, labels, aliases):
+        """
+        Add the labels and aliases the item lacks.
+
+        A label is only set in languages that don't have one, other texts
+        are added as aliases unless the item already has them, ignoring
+        case.
+
+        :param labels: dict of language: label
+        :param aliases: dict of language: list of aliases
+        """
+        texts = list(labels.items())
+        texts.extend((lang, alias)
+                     for lang, lang_aliases in aliases.items()
+                     for alias in lang_aliases)
+        for lang, text in texts:
+            if not text:
+                continue
+            if lang not in self.wd_item.labels and lang not in self.labels:
+                self.labels[lang] = text
+                continue
+            known = [self.wd_item.labels.get(lang), self.labels.get(lang)]
+            known.extend(self.wd_item.aliases.get(lang, []))
+            known.extend(x["value"] for x in self.aliases.get(lang, []))
+            if text.lower() not in [x.lower() for x in known if x]:
+                self.aliases.setdefault(lang, []).append(
+                    {"language": lang, "value": text, "add": ""})
+
+    def add_descriptions(self, descriptions):
+        """
+        Add the descriptions in languages the item has none in.
+
+        :param descriptions: dict of language: description
+        """
+        for lang, text in descriptions.items():
+            if text and lang not in self.wd_item.descriptions:
+                self.descriptions[lang] = text
+
+    def has_qualifiers(self, claim, quals):
+        """
+        Check if a claim has exactly the given qualifiers.
+
+        :param claim: the pywikibot.Claim to check
+        :param quals: dict of property: value of the qualifiers
+        """
+        if sum(len(x) for x in claim.qualifiers.values()) != len(quals):
+            return False
+        return all(any(qualifier.target_equals(value)
+                       for qualifier in claim.qualifiers.get(prop, []))
+                   for prop, value in quals.items())
+
+    def has_reference(self, claim, source_test):
+        """
+        Check if a claim already has a reference.
+
+        A reference is present if one of the sources of the claim has
+        all of its tested claims.
+
+        :param claim: the pywikibot.Claim to check
+        :param source_test: the claims of the reference that identify it,
+            as in a WikidataStuff Reference
+        """
+        return any(all(any(existing.target_equals(test.getTarget())
+                           for existing in source.get(test.getID(), []))
+                       for test in source_test)
+                   for source in claim.sources)
+
+    def match_claim(self, claims, target, quals):
+        """
+        Find the claim a value should be added to.
+
+        This is a claim with the same value and the same qualifiers, or,
+        for a value with qualifiers, one without any to add them to.
+
+        :param claims: the claims of the property
+        :param target: the value
+        :param quals: dict of property: value of the qualifiers
+        :return: the matching claim, or None if the value is new
+        """
+        same_value = [x for x in claims if x.target_equals(target)]
+        for claim in same_value:
+            if self.has_qualifiers(claim, quals):
+                return claim
+        for claim in same_value:
+            if not quals or not claim.qualifiers:
+                return claim
+        return None
+
+    def get_claims(self, prop):
+        """
+        Get the claims of a property, including those added so far.
+
+        These are copies that can be changed without editing the item.
+
+        :param prop: the property, e.g. P31
+        """
+        if prop not in self.claims:
+            self.claims[prop] = [self.copy_claim(x)
+                                 for x in self.wd_item.claims.get(prop, [])]
+        return self.claims[prop]
+
+    def add_claim(self, prop, target, quals=None, source_test=None,
+                  source_notest=None):
+        """
+        Add a value, with its qualifiers and reference, if missing.
+
+        :param prop: the property, e.g. P31
+        :param target: the value
+        :param quals: dict of property: value of the qualifiers
+        :param source_test: the claims of the reference that identify it
+        :param source_notest: the other claims of the reference, e.g.
+            the retrieval date
+        """
+        quals = quals or {}
+        prop_claims = self.get_claims(prop)
+        claim = self.match_claim(prop_claims, target, quals)
+        updated = False
+        if claim is None:
+            claim = self.make_claim(prop, target)
+            prop_claims.append(claim)
+            updated = True
+        if quals and not claim.qualifiers:
+            for qual, qual_target in quals.items():
+                claim.addQualifier(
+                    self.make_claim(qual, qual_target, is_qualifier=True))
+            updated = True
+        if source_test and not self.has_reference(claim, source_test):
+            claim.addSources(source_test + (source_notest or []))
+            updated = True
+        if updated and not any(claim is x for x in self.changed):
+            self.changed.append(claim)
+
+    def get_counts(self):
+        """Get the number of labels, aliases, descriptions and claims."""
+        return {
+            "labels": len(self.labels),
+            "aliases": sum(len(x) for x in self.aliases.values()),
+            "descriptions": len(self.descriptions),
+            "claims": len(self.changed)}
+
+    def get_data(self):
+        """
+        Get the changes to send with wbeditentity.
+
+        :return: dict with the labels, aliases, descriptions and claims
+            to add, empty if the item lacks nothing
+        """
+        data = {}
+        if self.labels:
+            data["labels"] = self.labels
+        if self.aliases:
+            data["aliases"] = self.aliases
+        if self.descriptions:
+            data["descriptions"] = self.descriptions
+        if self.changed:
+            data["claims"] = [claim.toJSON() for claim in self.changed]
+        return data
+
+    def __init__(self, wd_item, make_claim, copy_claim):
+        """
+        Initialize an empty difference.
+
+        :param wd_item: the item to edit, with its labels, aliases,
+            descriptions and claims loaded
+        :param make_claim: function making a claim from a property and a
+            value, and is_qualifier=True for a qualifier
+        :param copy_claim: function making a detached copy of a claim of
+            the item
+        """
+        self.wd_item = wd_item
+        self.make_claim = make_claim
+        self.copy_claim = copy_claim
+        self.labels = {}
+        self.aliases = {}
+        self.descriptions = {}
+        self.claims = {}
+        self.changed = []
@@ -173,6 +173,7 @@ if __name__ == "__main__":
     """Command line entry point for importer."""
     args = importer.handle_args()
     dataset = Dataset("es", "es", EsEs)
+    dataset.id_column = "bic"
     dataset.data_files = {
         "municipalities": "spain_municipalities.json",
         "provinces": "spain_provinces.json"}
@@ -151,6 +151,7 @@ if __name__ == "__main__":
     """Command line entry point for importer."""
     args = importer.handle_args()
     dataset = Dataset("ge", "ka", GeKa)
+    dataset.id_column = "id"
     dataset.data_files = {
         "admin": "georgia_admin.json",
         "settlements": "georgia_settlements.json"
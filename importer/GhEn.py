@@ -89,6 +89,7 @@ if __name__ == "__main__":
     """Command line entry point for importer."""
     args = importer.handle_args()
     dataset = Dataset("gh", "en", GhEn)
+    dataset.id_column = "id"
     dataset.data_files = {
         "regions": "ghana_regions.json"  # http://tinyurl.com/y9ye4kfg
     }
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+List of dicts with hash indexes over its fields.
+
+Used for the offline mapping files, which are searched by the value of
+some field many times per row. The index of a field is built the first
+time it's searched, and dropped if the list is modified.
+"""
+
+
+class IndexedTable(list):
+    """A list of dicts that can be looked up by the value of a field."""
+
+    def get_index(self, field, lowercase=False):
+        """
+        Get the index of a field.
+
+        :param field: the field to index the rows by
+        :param lowercase: whether to index the lowercased (string) values
+        :return: dict of value to the list of rows having it, in the order
+            of the table, or None if some value cannot be indexed
+        """
+        if (field, lowercase) not in self.indexes:
+            index = {}
+            try:
+                for row in self:
+                    value = row[field]
+                    if lowercase:
+                        value = value.lower()
+                    index.setdefault(value, []).append(row)
+            except TypeError:  # unhashable value
+                index = None
+            self.indexes[(field, lowercase)] = index
+        return self.indexes[(field, lowercase)]
+
+    def lookup(self, field, value, lowercase=False):
+        """
+        Get all the rows where a field has a certain value.
+
+        :param field: the field to search in
+        :param value: the value to match
+        :param lowercase: whether to match the lowercased values of the
+            field, the value itself should then be in lowercase
+        :return: list of matching rows, in the order of the table
+        """
+        index = self.get_index(field, lowercase)
+        if index is None:
+            return [row for row in self
+                    if (row[field].lower() if lowercase else row[field]) ==
+                    value]
+        try:
+            return list(index.get(value, []))
+        except TypeError:  # unhashable value, can't match anything indexed
+            return [row for row in self if row[field] == value]
+
+    def invalidate(self):
+        """Drop the indexes, e.g. after the table has been modified."""
+        self.indexes = {}
+
+    def __init__(self, rows=()):
+        """
+        Initialize the table.
+
+        :param rows: the dicts to put in the table
+        """
+        super(IndexedTable, self).__init__(rows)
+        self.indexes = {}
+
+
+def _invalidating(method):
+    """Wrap a list method so that it drops the indexes of the table."""
+    def wrapper(self, *args, **kwargs):
+        self.indexes = {}
+        return method(self, *args, **kwargs)
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear",
+              "sort", "reverse", "__setitem__", "__delitem__", "__iadd__",
+              "__imul__"):
+    setattr(IndexedTable, _name, _invalidating(getattr(list, _name)))
@@ -85,6 +85,7 @@ if __name__ == "__main__":
     """Command line entry point for importer."""
     args = importer.handle_args()
     dataset = Dataset("ir", "fa", IrFa)
+    dataset.id_column = "id"
     dataset.data_files = {
         "provinces": "iran_provinces.json",  # http://tinyurl.com/yd9xed2s
         "cities": "iran_cities.json"  # http://tinyurl.com/ybslxkm9
@@ -76,4 +76,5 @@ if __name__ == "__main__":
     """Command line entry point for importer."""
     args = importer.handle_args()
     dataset = Dataset("ke", "en", KeEn)
+    dataset.id_column = "id"
     importer.main(args, dataset)
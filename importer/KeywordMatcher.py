@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Matcher of many keywords in a text at once.
+
+The keywords are compiled into an Aho-Corasick automaton, which finds all
+of them that occur in a text in a single pass over it, however many
+keywords there are. Used to detect the type of a monument from words in
+its name, see utils.get_longest_match().
+"""
+
+
+class KeywordMatcher(object):
+    """An Aho-Corasick automaton of a list of keywords."""
+
+    def build(self):
+        """Build the trie of the keywords and its failure links."""
+        for keyword in self.positions:
+            if not keyword:
+                continue
+            state = 0
+            for char in keyword:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state] = keyword
+
+        # breadth first, so the failure link of a state is known
+        # before those of the states below it
+        queue = list(self.goto[0].values())
+        self.dict_link = [0] * len(self.goto)
+        for state in queue:
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                if char in self.goto[fallback]:
+                    fallback = self.goto[fallback][char]
+                self.fail[next_state] = fallback
+                # nearest state below the failure link ending a keyword
+                if self.output[fallback] is not None:
+                    self.dict_link[next_state] = fallback
+                else:
+                    self.dict_link[next_state] = self.dict_link[fallback]
+
+    def find_keywords(self, text):
+        """
+        Get all the keywords that occur in a text.
+
+        :param text: the text to search
+        :return: set of keywords
+        """
+        found = set()
+        if "" in self.positions:
+            found.add("")
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            match = state if self.output[state] is not None \
+                else self.dict_link[state]
+            while match and self.output[match] not in found:
+                found.add(self.output[match])
+                match = self.dict_link[match]
+        return found
+
+    def get_longest_match(self, text):
+        """
+        Get the longest keyword(s) occurring in a text.
+
+        Gives the same result as utils.get_longest_match() does with the
+        list of keywords, including repeated keywords.
+
+        :param text: the text to search
+        :return: single keyword if there's only one with the max length,
+            a list of keywords if there are several, or None if no keyword
+            occurs in the text
+        """
+        found = self.find_keywords(text)
+        if not found:
+            return None
+        max_length = max(len(x) for x in found)
+        positions = sorted(position for keyword in found
+                           if len(keyword) == max_length
+                           for position in self.positions[keyword])
+        matches = [self.keywords[position] for position in positions]
+        if len(matches) == 1:
+            return matches[0]
+        else:
+            return matches
+
+    def __init__(self, keywords):
+        """
+        Compile the keywords.
+
+        :param keywords: list of keywords to look for
+        """
+        self.keywords = list(keywords)
+        self.positions = {}
+        for position, keyword in enumerate(self.keywords):
+            self.positions.setdefault(keyword, []).append(position)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]
+        self.build()
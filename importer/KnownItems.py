@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Index of the Wikidata items that already use a unique property.
+
+Maps each value of the property to the item using it, like the dict it
+replaces, while also keeping track of which values each item has, so that
+checking whether an item is known doesn't require a scan of all of them.
+
+Rows processed in worker processes each use a copy of the index. The
+lookups and changes made by a row can be recorded in the worker, and
+merged into the index of the parent process, in the order of the rows,
+if the parent's index gives the same answers to the lookups.
+"""
+from collections.abc import MutableMapping
+
+
+class KnownItems(MutableMapping):
+    """A dict of property value to item, indexed in both directions."""
+
+    def __getitem__(self, value):
+        """Get the item that has a value."""
+        if self.record is not None:
+            self.record["values"].setdefault(value, self.lookup(value))
+        return self.items_by_value[value]
+
+    def __setitem__(self, value, item):
+        """Set the item that has a value."""
+        if self.record is not None:
+            self.record["values"].setdefault(value, self.lookup(value))
+            self.record["added"].append((value, item))
+        if value in self.items_by_value:
+            self.discard_value(value)
+        self.items_by_value[value] = item
+        self.values_by_item.setdefault(item, set()).add(value)
+
+    def __delitem__(self, value):
+        """Forget about a value."""
+        self.discard_value(value)
+        del self.items_by_value[value]
+
+    def __iter__(self):
+        """Iterate over the values."""
+        return iter(self.items_by_value)
+
+    def __len__(self):
+        """Get the number of values."""
+        return len(self.items_by_value)
+
+    def __repr__(self):
+        """Represent the index as the dict of values."""
+        return "KnownItems({!r})".format(self.items_by_value)
+
+    def discard_value(self, value):
+        """Remove a value from the values of the item it belongs to."""
+        item = self.items_by_value[value]
+        item_values = self.values_by_item[item]
+        item_values.discard(value)
+        if not item_values:
+            del self.values_by_item[item]
+
+    def lookup(self, value):
+        """Get whether a value is known and the item that has it."""
+        return (value in self.items_by_value, self.items_by_value.get(value))
+
+    def has_item(self, item):
+        """Check whether an item has any value of the property."""
+        if self.record is not None:
+            self.record["items"].setdefault(item, item in self.values_by_item)
+        return item in self.values_by_item
+
+    def get_values(self, item):
+        """Get the values of the property that an item has."""
+        return set(self.values_by_item.get(item, ()))
+
+    def start_recording(self):
+        """Record the lookups and changes made from now on."""
+        self.record = {"values": {}, "items": {}, "added": []}
+
+    def stop_recording(self):
+        """
+        Stop recording.
+
+        :return: the record, with the answer to the first lookup of each
+            value and item, and the values set, in order
+        """
+        record = self.record
+        self.record = None
+        return record
+
+    def merge(self, record):
+        """
+        Make the changes recorded in another copy of the index.
+
+        They are only made if this index gives the same answers to the
+        lookups that were recorded, since the changes depend on them.
+
+        :param record: the record made by stop_recording()
+        :return: whether the changes were made
+        """
+        if any(self.lookup(value) != answer
+               for value, answer in record["values"].items()):
+            return False
+        if any((item in self.values_by_item) != answer
+               for item, answer in record["items"].items()):
+            return False
+        for value, item in record["added"]:
+            self[value] = item
+        return True
+
+    def __init__(self, items=None):
+        """
+        Initialize the index.
+
+        :param items: optional dict of property value to item to start with
+        """
+        self.items_by_value = {}
+        self.values_by_item = {}
+        self.record = None
+        if items:
+            self.update(items)
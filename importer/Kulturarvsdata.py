@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Client of the kulturarvsdata.se API of the Swedish heritage registers.
+
+All the requests of a process go through one keep-alive session.
+Existence checks use HEAD requests, and the JSON-LD documents are kept in
+an on-disk cache, stored under the SHA-1 of their URL, until they are
+older than the time to live. The documents of upcoming objects can be
+downloaded concurrently in advance with prefetch().
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = "http://kulturarvsdata.se/"
+DEFAULT_WORKERS = 8
+TIMEOUT = 60  # seconds
+DEFAULT_TTL = 7 * 24 * 60 * 60  # one week, in seconds
+
+
+class Kulturarvsdata(object):
+    """A pooled and caching client of kulturarvsdata.se."""
+
+    def get_session(self):
+        """
+        Get the HTTP session of the current process.
+
+        A new session is made in forked processes, so that they don't
+        share connections with their parent.
+        """
+        with self.lock:
+            if self.session is None or self.pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1,
+                                      pool_maxsize=max(self.workers, 1))
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self.session = session
+                self.pid = os.getpid()
+            return self.session
+
+    def make_url(self, path):
+        """Get the full URL of a path, e.g. raa/bbr/21300000003265."""
+        return self.base_url + path
+
+    def get_http_code(self, path):
+        """
+        Get the status code of a resource without downloading it.
+
+        :param path: path of the resource, e.g. raa/bbr/21300000003265
+        """
+        url = self.make_url(path)
+        response = self.get_session().head(
+            url, allow_redirects=True, timeout=TIMEOUT)
+        if response.status_code in (405, 501):
+            # HEAD not supported
+            response = self.get_session().get(url, timeout=TIMEOUT)
+        return response.status_code
+
+    def get_bbr_link(self, bbr_id):
+        """
+        Get the path of a building (complex) in BBR.
+
+        Buildings can be either under raa/bbra/ or raa/bbr/, the first
+        one that exists is returned. The result is remembered if it was
+        found, or if both answered that it doesn't exist, so that other
+        errors are retried the next time.
+
+        :param bbr_id: the BBR ID, e.g. 21300000003265
+        :return: e.g. raa/bbr/21300000003265, or None if neither exists
+        """
+        if bbr_id in self.bbr_links:
+            return self.bbr_links[bbr_id]
+        codes = []
+        for prefix in ("raa/bbra/", "raa/bbr/"):
+            code = self.get_http_code(prefix + bbr_id)
+            if code == 200:
+                self.bbr_links[bbr_id] = prefix + bbr_id
+                return self.bbr_links[bbr_id]
+            codes.append(code)
+        if all(code == 404 for code in codes):
+            self.bbr_links[bbr_id] = None
+        return None
+
+    def get_cache_filename(self, url):
+        """Get the path of the cached copy of a URL."""
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".json")
+
+    def is_cached(self, filename):
+        """Check whether a cached copy exists and is younger than the TTL."""
+        try:
+            modified = os.path.getmtime(filename)
+        except OSError:
+            return False
+        return time.time() - modified <= self.ttl
+
+    def get_jsonld(self, path):
+        """
+        Get the JSON-LD document of a resource.
+
+        Successful responses are cached on disk, if a cache directory is
+        set, and downloaded again once the cached copy has expired.
+
+        :param path: path of the resource, e.g. raa/bbr/21300000003265
+        :return: the decoded document, or None if it isn't valid JSON
+        """
+        path_parts = path.split("/")
+        path_parts.insert(-1, "jsonld")
+        url = self.make_url("/".join(path_parts))
+
+        filename = self.cache_dir and self.get_cache_filename(url)
+        if filename and self.is_cached(filename):
+            with open(filename, "rb") as f:
+                content = f.read()
+        else:
+            response = self.get_session().get(url, timeout=TIMEOUT)
+            content = response.content
+            if filename and response.status_code == 200:
+                os.makedirs(os.path.dirname(filename), exist_ok=True)
+                tmp_filename = "{}.{}.{}.tmp".format(
+                    filename, os.getpid(), threading.get_ident())
+                with open(tmp_filename, "wb") as f:
+                    f.write(content)
+                os.replace(tmp_filename, filename)
+        try:
+            return json.loads(content.decode("utf-8"))
+        except ValueError:
+            return None
+
+    def prefetch(self, bbr_ids, workers=None):
+        """
+        Look up many BBR buildings concurrently.
+
+        Resolves their links and downloads their JSON-LD documents into
+        the cache, so that getting them later doesn't have to wait for the
+        server. Failed requests are left to be retried then.
+
+        :param bbr_ids: the BBR IDs
+        :param workers: maximum number of simultaneous requests, if other
+            than the one given when the client was made
+        """
+        def fetch(bbr_id):
+            try:
+                bbr_link = self.get_bbr_link(bbr_id)
+                if bbr_link and self.cache_dir:
+                    self.get_jsonld(bbr_link)
+            except requests.RequestException:
+                return
+
+        pending = sorted(set(bbr_id for bbr_id in bbr_ids
+                             if bbr_id and bbr_id not in self.bbr_links))
+        if not pending:
+            return
+        if workers and workers > self.workers:
+            # make a session with a connection pool large enough
+            with self.lock:
+                self.workers = workers
+                self.session = None
+        with ThreadPoolExecutor(max_workers=workers or self.workers) as pool:
+            list(pool.map(fetch, pending))
+
+    def __init__(self,
+                 base_url=DEFAULT_BASE_URL,
+                 cache_dir=None,
+                 workers=DEFAULT_WORKERS,
+                 ttl=DEFAULT_TTL):
+        """
+        Initialize the client.
+
+        :param base_url: URL of the API, ending with a slash
+        :param cache_dir: directory to cache the JSON-LD documents in,
+            None to not cache them
+        :param workers: maximum number of simultaneous requests
+        :param ttl: number of seconds after which a cached document is
+            downloaded again
+        """
+        self.base_url = base_url
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.ttl = ttl
+        self.bbr_links = {}
+        self.lock = threading.Lock()
+        self.session = None
+        self.pid = None
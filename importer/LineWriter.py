@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Buffered writer of text files made line by line.
+
+Used for the output of a run that's made one monument at a time, so that
+it's written out as the run goes instead of being collected in memory.
+"""
+
+BUFFER_SIZE = 64 * 1024  # bytes
+
+
+class LineWriter(object):
+    """A text file that is written one line at a time."""
+
+    def write_line(self, text):
+        """
+        Write a line.
+
+        The lines are separated by newlines, without one after the last
+        line, as when joining them.
+
+        :param text: the line to write, without newline
+        """
+        if self.file is None:
+            self.file = open(self.filename, "w", encoding="utf-8",
+                             buffering=self.buffer_size)
+        else:
+            self.file.write("\n")
+        self.file.write(text)
+        self.count += 1
+
+    def close(self):
+        """Flush and close the file, if anything has been written."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __init__(self, filename, buffer_size=BUFFER_SIZE):
+        """
+        Initialize the writer.
+
+        The file is only created when the first line is written.
+
+        :param filename: the file to write
+        :param buffer_size: number of bytes to buffer before writing
+        """
+        self.filename = filename
+        self.buffer_size = buffer_size
+        self.file = None
+        self.count = 0
@@ -1,16 +1,20 @@
+import atexit
 import datetime
+import json
+import queue
+import threading
+import time
 from os import path, makedirs
 
+FLUSH_LINES = 100
+FLUSH_INTERVAL = 5  # seconds
+
 
 class Logger(object):
 
     def create_filename(self):
         return datetime.date.today().strftime("%Y-%m-%d" + ".log")
 
-    def save_line_to_file(self, filename, text):
-        with open(filename, 'a', encoding="utf-8") as f:
-            f.write(text + "\n")
-
     def get_current_timestamp(self):
         return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
@@ -18,11 +22,108 @@ class Logger(object):
         timestamp = self.get_current_timestamp()
         return timestamp + "\t" + message
 
-    def logit(self, message):
-        ts_mess = self.append_timestamp_to_message(message)
-        self.save_line_to_file(self.file_path, ts_mess)
+    def format_record(self, message, fields):
+        """
+        Format a log line.
+
+        :param message: the message to log
+        :param fields: additional data about the event, only used for
+            JSON records
+        """
+        if not self.json_records:
+            return self.append_timestamp_to_message(message)
+        record = {"time": self.get_current_timestamp(), "message": message}
+        record.update(fields)
+        return json.dumps(record, ensure_ascii=False, sort_keys=True)
+
+    def logit(self, message, **fields):
+        """
+        Log a message.
+
+        The line is buffered, and written to the file when enough lines
+        have been logged or enough time has passed, see flush().
+
+        :param message: the message to log
+        :param fields: additional data about the event, e.g. the item
+            edited, only used for JSON records
+        """
+        line = self.format_record(message, fields)
+        if self.queue is not None:
+            self.queue.put(line)
+        else:
+            with self.lock:
+                self.buffer_line(line)
+
+    def buffer_line(self, line):
+        """Add a line to the buffer, writing it if it's due."""
+        self.buffer.append(line)
+        if (len(self.buffer) >= self.flush_lines or
+                time.time() - self.last_flush >= self.flush_interval):
+            self.write_buffer()
+
+    def write_buffer(self):
+        """Write the buffered lines to the file."""
+        if self.buffer:
+            if self.file is None:
+                self.file = open(self.file_path, 'a', encoding="utf-8")
+            self.file.write("\n".join(self.buffer) + "\n")
+            self.file.flush()
+            self.buffer = []
+        self.last_flush = time.time()
+
+    def flush(self):
+        """Write all the lines logged so far to the file."""
+        if self.queue is not None:
+            self.queue.join()
+        with self.lock:
+            self.write_buffer()
+
+    def write_in_background(self):
+        """Write the lines put in the queue, until None is put in it."""
+        while True:
+            try:
+                line = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                with self.lock:
+                    self.write_buffer()
+                continue
+            try:
+                with self.lock:
+                    if line is None:
+                        self.write_buffer()
+                        return
+                    self.buffer_line(line)
+            finally:
+                self.queue.task_done()
+
+    def close(self):
+        """Flush the log and close the file, this is also done at exit."""
+        if self.queue is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.queue = None
+        with self.lock:
+            self.write_buffer()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def __init__(self,
+                 json_records=False,
+                 background=False,
+                 flush_lines=FLUSH_LINES,
+                 flush_interval=FLUSH_INTERVAL):
+        """
+        Initialize the log of the day.
 
-    def __init__(self):
+        :param json_records: whether to log JSON objects instead of
+            tab separated lines
+        :param background: whether to write the file from a separate
+            thread, so that logging never waits for the disk
+        :param flush_lines: number of lines after which to write the file
+        :param flush_interval: number of seconds after which to write the
+            file
+        """
         directory_path = "logs"
         filename = self.create_filename()
         self.file_path = path.join(directory_path, filename)
@@ -31,3 +132,17 @@ class Logger(object):
         filename = self.create_filename()
         if not path.exists(self.file_path):
             open(self.file_path, 'w', encoding="utf-8").close()
+        self.json_records = json_records
+        self.flush_lines = flush_lines
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.last_flush = time.time()
+        self.file = None
+        self.lock = threading.Lock()
+        self.queue = None
+        if background:
+            self.queue = queue.Queue()
+            self.thread = threading.Thread(target=self.write_in_background)
+            self.thread.daemon = True
+            self.thread.start()
+        atexit.register(self.close)
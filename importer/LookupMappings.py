@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Mappings of a lookup table, with an index of the lowercased labels.
+
+The lookup tables map labels, as they appear in the data, to lists of
+items. The labels are matched without regard to case, which used to mean
+lowercasing every label of the table for each value looked up.
+"""
+
+
+class LookupMappings(dict):
+    """A dict of label to mapping, that can be searched by lowercase label."""
+
+    def get_lowercase_index(self):
+        """
+        Get the index of the lowercased labels.
+
+        :return: dict of lowercased label to the first label (in the order
+            of the table) that lowercases to it
+        """
+        if self.lowercase_index is None:
+            index = {}
+            for label in self:
+                index.setdefault(label.lower(), label)
+            self.lowercase_index = index
+        return self.lowercase_index
+
+    def get_items(self, value):
+        """
+        Get the items of the label matching a lowercase value.
+
+        :param value: the value to match, in lowercase
+        :return: the list of items of the first matching label, or None if
+            no label matches
+        """
+        label = self.get_lowercase_index().get(value)
+        if label is None:
+            return None
+        return self[label]["items"]
+
+    def __setitem__(self, label, mapping):
+        """Set the mapping of a label."""
+        self.lowercase_index = None
+        super(LookupMappings, self).__setitem__(label, mapping)
+
+    def __delitem__(self, label):
+        """Remove the mapping of a label."""
+        self.lowercase_index = None
+        super(LookupMappings, self).__delitem__(label)
+
+    def update(self, *args, **kwargs):
+        """Set the mappings of several labels."""
+        self.lowercase_index = None
+        super(LookupMappings, self).update(*args, **kwargs)
+
+    def setdefault(self, label, mapping=None):
+        """Set the mapping of a label, unless it has one already."""
+        self.lowercase_index = None
+        return super(LookupMappings, self).setdefault(label, mapping)
+
+    def pop(self, *args):
+        """Remove the mapping of a label and return it."""
+        self.lowercase_index = None
+        return super(LookupMappings, self).pop(*args)
+
+    def popitem(self):
+        """Remove the last label and return it with its mapping."""
+        self.lowercase_index = None
+        return super(LookupMappings, self).popitem()
+
+    def clear(self):
+        """Remove all the mappings."""
+        self.lowercase_index = None
+        super(LookupMappings, self).clear()
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the mappings, with the same arguments as a dict."""
+        super(LookupMappings, self).__init__(*args, **kwargs)
+        self.lowercase_index = None
@@ -5,6 +5,7 @@ import importer_utils as utils
 MAPPING_DIR = "mappings"
 MAX_LABEL_LENGTH = 250
 P31_BLACKLIST = utils.load_json(path.join(MAPPING_DIR, "P31_blacklist.json"))
+P31_BLACKLIST_ITEMS = frozenset(x["item"] for x in P31_BLACKLIST)
 
 
 class Monument(object):
@@ -16,7 +17,7 @@ class Monument(object):
         :param db_row_dict: raw data from the database
         :param mapping: mapping file object
         :param data_files: resources like dictionaries of known placenames to match
-        :param existing: list of Wikidata items using a specific property
+        :param existing: KnownItems of Wikidata items using a property
             that is optionally specified in the mapping file and is supposed to
             hold unique values
         :param repository: data repository (Wikidata site)
@@ -39,6 +40,34 @@ class Monument(object):
         self.problem_report = {}
         self.upload = True  # assume that upload of this monument is ok
 
+    @classmethod
+    def prepare_data_files(cls, data_files):
+        """
+        Derive the data needed by all objects from the loaded data files.
+
+        Called once, in the main process, after the data files have been
+        loaded. Override this in datasets that build e.g. an index of a
+        data file, so that it's shared by the worker processes instead of
+        being built again in each of them.
+
+        :param data_files: the loaded data files, which can be added to
+        """
+        pass
+
+    @classmethod
+    def prefetch_online_data(cls, rows, workers):
+        """
+        Download online data needed by upcoming rows in advance.
+
+        Called before each batch of rows is processed. Override this in
+        datasets that look up each of their objects online, so that the
+        lookups of a batch can be made concurrently.
+
+        :param rows: database rows that will be processed next
+        :param workers: maximum number of simultaneous downloads
+        """
+        pass
+
     def print_wd(self):
         """Print the data object dictionary on screen."""
         print(
@@ -576,7 +605,7 @@ class Monument(object):
         (specified in mapping) that was downloaded in the
         beginning of the process.
         """
-        return wd_item in self.existing.values()
+        return self.existing.has_item(wd_item)
 
     def find_matching_wikidata(self, mapping):
         """
@@ -598,7 +627,6 @@ class Monument(object):
         """
         item = self.exists_with_prop(mapping)
         if not item:
-            disallowed = [x["item"] for x in P31_BLACKLIST]
             item = self.exists_with_wd_item()
             if not item:
                 item = self.exists_with_monument_article(
@@ -606,7 +634,8 @@ class Monument(object):
             if item and self.in_known_items(item):
                 self.upload = False
                 self.add_to_report("item_conflict", item)
-            elif utils.is_blacklisted_P31(item, self.repo, disallowed):
+            elif item and utils.is_blacklisted_P31(
+                    item, self.repo, P31_BLACKLIST_ITEMS):
                 # the matched item is blacklisted remove match
                 item = None
             else:
@@ -710,6 +739,12 @@ class Dataset(object):
         self.data_files = {}
         self.subclass_downloads = None
         self.lookup_downloads = None
+        # Unique column used to page through the table. Should be the column
+        # the monument_class uses for its monuments_all_id.
+        self.id_column = None
+        # Columns containing the title of an article about the monument,
+        # see exists_with_monument_article().
+        self.article_columns = ["monument_article"]
 
     @property
     def table_name(self):
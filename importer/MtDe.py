@@ -107,5 +107,7 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("mt", "de", MtDe)
+    dataset.id_column = "inventarnummer"
+    dataset.article_columns = ["artikel"]
     dataset.data_files = {"councils": "malta_councils.json"}
     importer.main(args, dataset)
@@ -84,5 +84,6 @@ if __name__ == "__main__":
     """Command line entry point for importer."""
     args = importer.handle_args()
     dataset = Dataset("nl-aw", "nl", NlAwNl)
+    dataset.id_column = "objectnr"
     dataset.data_files = {"settlements": "aruba_settlements.json"}
     importer.main(args, dataset)
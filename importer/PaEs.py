@@ -80,5 +80,7 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("pa", "es", PaEs)
+    dataset.id_column = "id"
+    dataset.article_columns = ["nombre"]
     dataset.data_files = {"provinces": "panama_provinces.json"}
     importer.main(args, dataset)
@@ -103,6 +103,8 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("pe", "es", PeEs)
+    dataset.id_column = "id"
+    dataset.article_columns = ["monumento_enlace", "monumento"]
     dataset.data_files = {
         "municipalities": "peru_provinces.json",
         "regions": "peru_regions.json"}
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Writer of the preview of processed monuments, as made with --table.
+
+The preview file is kept open and buffered for the whole run, and can
+optionally be split into several files of a fixed number of monuments,
+e.g. to keep each of them small enough to paste into a wiki page.
+"""
+import os
+
+BUFFER_SIZE = 256 * 1024  # bytes
+
+
+class PreviewWriter(object):
+    """A buffered, optionally sharded, preview file."""
+
+    def make_shard_filename(self, shard):
+        """
+        Get the name of a file of the preview.
+
+        :param shard: number of the file, starting from 1
+        """
+        if not self.shard_size:
+            return self.filename
+        base, extension = os.path.splitext(self.filename)
+        return "{0}_{1}{2}".format(base, shard, extension)
+
+    def write_monument(self, *texts):
+        """
+        Write the preview of a monument.
+
+        :param texts: the parts of the preview, e.g. the raw data and the
+            wikitable rows, each written on its own line(s)
+        """
+        if self.shard_size and self.count % self.shard_size == 0:
+            self.close()
+        if self.file is None:
+            filename = self.make_shard_filename(len(self.filenames) + 1)
+            self.file = open(filename, "a", encoding="utf-8",
+                             buffering=self.buffer_size)
+            self.filenames.append(filename)
+        for text in texts:
+            self.file.write(text + "\n")
+        self.count += 1
+
+    def close(self):
+        """Flush and close the current file."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __init__(self, filename, shard_size=None, buffer_size=BUFFER_SIZE):
+        """
+        Initialize the writer.
+
+        :param filename: the preview file. When sharding, the files are
+            numbered by adding _1, _2 etc. to its name.
+        :param shard_size: number of monuments per file, None to write
+            all of them to one file
+        :param buffer_size: number of bytes to buffer before writing
+        """
+        self.filename = filename
+        self.shard_size = shard_size
+        self.buffer_size = buffer_size
+        self.file = None
+        self.filenames = []
+        self.count = 0
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental writer of problem reports.
+
+Each report is appended to a JSON Lines file as soon as it's made, and the
+file is synced to disk at intervals, so that an interrupted run still
+leaves the reports made so far. When the run is done, the reports can be
+converted to the single indented JSON file used before.
+"""
+import json
+import os
+import time
+
+SYNC_EVERY = 100  # reports
+SYNC_INTERVAL = 10  # seconds
+
+
+class ReportWriter(object):
+    """Append-only sink of problem reports, in JSON Lines format."""
+
+    def write(self, report):
+        """
+        Append a report.
+
+        :param report: the problem report of a monument
+        """
+        if self.file is None:
+            self.file = open(self.jsonl_filename, "a", encoding="utf-8")
+        self.file.write(json.dumps(report,
+                                   sort_keys=True,
+                                   ensure_ascii=False,
+                                   default=self.default) + "\n")
+        self.count += 1
+        self.unsynced += 1
+        if (self.unsynced >= self.sync_every or
+                time.time() - self.last_sync >= self.sync_interval):
+            self.sync()
+
+    def sync(self):
+        """Make sure all the reports written so far are on disk."""
+        if self.file is not None:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.time()
+
+    def close(self):
+        """Sync and close the JSON Lines file."""
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+    def finalize(self):
+        """
+        Convert the reports to a single indented JSON file.
+
+        The output is the same as json_to_file() gives for the list of
+        reports, but it's made one report at a time. The JSON Lines file
+        is removed afterwards. Nothing is written if there are no reports.
+        """
+        self.close()
+        if not os.path.isfile(self.jsonl_filename):
+            return
+        tmp_filename = self.filename + ".tmp"
+        with open(self.jsonl_filename, encoding="utf-8") as jsonl, \
+                open(tmp_filename, "w", encoding="utf-8") as f:
+            separator = "[\n"
+            for line in jsonl:
+                report = json.loads(line)
+                text = json.dumps(report,
+                                  sort_keys=True,
+                                  indent=4,
+                                  ensure_ascii=False)
+                f.write(separator)
+                f.write("\n".join("    " + x for x in text.split("\n")))
+                separator = ",\n"
+            f.write("\n]" if separator == ",\n" else "[]")
+        os.replace(tmp_filename, self.filename)
+        os.remove(self.jsonl_filename)
+
+    def __init__(self,
+                 filename,
+                 default=None,
+                 sync_every=SYNC_EVERY,
+                 sync_interval=SYNC_INTERVAL):
+        """
+        Initialize the writer.
+
+        :param filename: the JSON file to finalize the reports to, the
+            JSON Lines file is written next to it, with the extension .jsonl
+        :param default: function to serialize objects that json can't,
+            as in json.dump()
+        :param sync_every: number of reports after which to sync the file
+        :param sync_interval: number of seconds after which to sync the
+            file
+        """
+        self.filename = filename
+        self.jsonl_filename = os.path.splitext(filename)[0] + ".jsonl"
+        self.default = default
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.file = None
+        self.count = 0
+        self.unsynced = 0
+        self.last_sync = time.time()
@@ -92,5 +92,6 @@ if __name__ == "__main__":
     """Command line entry point for importer."""
     args = importer.handle_args()
     dataset = Dataset("ro", "ro", RoRo)
+    dataset.id_column = "cod"
     dataset.data_files = {"counties": "romania_counties.json"}
     importer.main(args, dataset)
@@ -117,6 +117,7 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("rs", "sr", RsSr)
+    dataset.id_column = "id"
     dataset.data_files = {"admin": "serbia_admin.json",
                           "okruzi": "serbia_okruzi.json",
                           "settlements": "serbia_settlements.json"}
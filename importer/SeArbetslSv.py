@@ -46,17 +46,11 @@ class SeArbetslSv(Monument):
             municip_name = self.kommun
         pattern = municip_name.lower() + " municipality"
         try:
-            municipality = [x["item"] for x in municip_dict if x[
-                "en"].lower() == pattern][0]
-            self.add_statement("located_adm", municipality)
-            swedish_name = [x["sv"]
-                            for x in municip_dict
-                            if x["item"] == municipality][0]
-            english_name = [x["en"]
-                            for x in municip_dict
-                            if x["item"] == municipality][0]
-            self.add_location_to_desc("sv", swedish_name)
-            self.add_location_to_desc("en", english_name)
+            municipality = municip_dict.lookup(
+                "en", pattern, lowercase=True)[0]
+            self.add_statement("located_adm", municipality["item"])
+            self.add_location_to_desc("sv", municipality["sv"])
+            self.add_location_to_desc("en", municipality["en"])
         except IndexError:
             print("Could not parse municipality: {}.".format(self.kommun))
             self.add_to_report("kommun", self.kommun)
@@ -76,14 +70,13 @@ class SeArbetslSv(Monument):
         if self.has_non_empty_attribute("typ"):
             table = self.data_files["types"]["mappings"]
             type_to_search_for = self.typ.lower()
-            try:
-                special_type = [table[x]["items"]
-                                for x in table
-                                if x.lower() == type_to_search_for][0]
+            special_type = utils.get_items_by_label(
+                type_to_search_for, table)
+            if special_type is None:
+                self.add_to_report("typ", self.typ)
+            else:
                 for special in special_type:
                     self.add_statement("is", special)
-            except IndexError:
-                self.add_to_report("typ", self.typ)
         return
 
     def set_location(self):
@@ -161,6 +154,7 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("se-arbetsl", "sv", SeArbetslSv)
+    dataset.id_column = "id"
     dataset.data_files = {
         "municipalities": "sweden_municipalities.json",
         "types": "se-arbetsl_(sv)_types.json",
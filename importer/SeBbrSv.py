@@ -1,11 +1,13 @@
 from Monument import Monument, Dataset
+from Kulturarvsdata import Kulturarvsdata
 import importer_utils as utils
 import importer as importer
-import requests
 from os import path
 
 
 MAPPING_DIR = "mappings"
+KULTURARVSDATA = Kulturarvsdata(
+    cache_dir=path.join(importer.CACHE_DIR, "kulturarvsdata"))
 
 
 class SeBbrSv(Monument):
@@ -37,7 +39,7 @@ class SeBbrSv(Monument):
             raa/bbr/21300000002805
         Depending on whether the prefix is raa/bbr/ or raa/bbra/
         """
-        self.bbr_link = utils.get_bbr_link(self.bbr)
+        self.bbr_link = KULTURARVSDATA.get_bbr_link(self.bbr)
 
     def set_bbr(self):
         """Set the BBR ID property."""
@@ -55,18 +57,9 @@ class SeBbrSv(Monument):
         self.kulturarv_id = self.wd_item["statements"][h_property][0]["value"]
         url = "http://kulturarvsdata.se/{}".format(self.kulturarv_id)
         print("Retrieving online data from {}".format(url))
-        # http://kulturarvsdata.se/raa/bbr/21300000023251
-        url_list = url.split("/")
-        url_list.insert(-1, "jsonld")
-        url = "/".join(url_list)
         # Request data in json format
         # http://kulturarvsdata.se/raa/bbr/jsonld/21300000023251
-        data = requests.get(url)
-        try:
-            result = data.json()
-        except ValueError:
-            result = None
-        self.online_data = result
+        self.online_data = KULTURARVSDATA.get_jsonld(self.kulturarv_id)
 
     def get_has_parts(self):
         """Get any parts listed in online data."""
@@ -171,13 +164,11 @@ class SeBbrSv(Monument):
             functions = functions_string.lower().split(",")
             for item in functions:
                 function = item.strip()
-                try:
-                    function_item = [functions_map[x]["items"]
-                                     for x in functions_map if
-                                     x.lower() == function]
-                    function_item_clean = function_item[0][0]
-                    self.add_statement("use", function_item_clean)
-                except IndexError:
+                function_items = utils.get_items_by_label(
+                    function, functions_map)
+                if function_items:
+                    self.add_statement("use", function_items[0])
+                else:
                     data_string = "{} ({})".format(function, self.funktion)
                     # report both this particular function and the whole
                     # string containing it
@@ -292,12 +283,11 @@ class SeBbrSv(Monument):
             municip_name = "Gothenburg"
         else:
             municip_name = self.kommun
-        municip_dict = utils.load_json(path.join(
-            MAPPING_DIR, "sweden_municipalities.json"))
+        municip_dict = self.data_files["municipalities"]
         pattern_en = municip_name.lower() + " municipality"
         try:
-            municipality = [x["item"] for x in municip_dict if x[
-                "en"].lower() == pattern_en][0]
+            municipality = municip_dict.lookup(
+                "en", pattern_en, lowercase=True)[0]["item"]
             self.add_statement("located_adm", municipality)
         except IndexError:
             print("Could not parse municipality: {}.".format(self.kommun))
@@ -380,6 +370,14 @@ class SeBbrSv(Monument):
             return
         self.wd_item["wd-item"] = None
 
+    @classmethod
+    def prefetch_online_data(cls, rows, workers):
+        """Look up the buildings of upcoming rows in kulturarvsdata."""
+        if workers:
+            bbr_ids = [row["bbr"].strip() for row in rows
+                       if isinstance(row.get("bbr"), str)]
+            KULTURARVSDATA.prefetch(bbr_ids, workers)
+
     def __init__(self, db_row_dict, mapping, data_files, existing, repository):
         Monument.__init__(self, db_row_dict, mapping,
                           data_files, existing, repository)
@@ -414,7 +412,9 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("se-bbr", "sv", SeBbrSv)
+    dataset.id_column = "bbr"
     dataset.data_files = {
         "functions": "se-bbr_(sv)_functions.json",
+        "municipalities": "sweden_municipalities.json",
         "settlements": "sweden_settlements.json"}
     importer.main(args, dataset)
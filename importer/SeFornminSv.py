@@ -104,8 +104,8 @@ class SeFornminSv(Monument):
             municip_name = self.kommun
         pattern = municip_name.lower() + " municipality"
         try:
-            municipality = [x["item"] for x in municip_dict if x[
-                "en"].lower() == pattern][0]
+            municipality = municip_dict.lookup(
+                "en", pattern, lowercase=True)[0]["item"]
             self.add_statement("located_adm", municipality)
         except IndexError:
             print("Could not parse municipality: {}.".format(self.kommun))
@@ -126,12 +126,11 @@ class SeFornminSv(Monument):
         if self.has_non_empty_attribute("typ"):
             table = self.data_files["types"]["mappings"]
             type_to_search_for = self.typ.lower()
-            try:
-                special_type = [table[x]["items"]
-                                for x in table
-                                if x.lower() == type_to_search_for][0][0]
-                self.substitute_statement("is", special_type)
-            except IndexError:
+            special_type = utils.get_items_by_label(
+                type_to_search_for, table)
+            if special_type:
+                self.substitute_statement("is", special_type[0])
+            else:
                 self.add_to_report("typ", self.typ)
 
     def get_socken(self, socken_name, landskap_name):
@@ -190,6 +189,8 @@ if __name__ == "__main__":
     """Command line entry point for importer."""
     args = importer.handle_args()
     dataset = Dataset("se-fornmin", "sv", SeFornminSv)
+    dataset.id_column = "id"
+    dataset.article_columns = ["artikel"]
     dataset.data_files = {
         "municipalities": "sweden_municipalities.json",
         "socken": "sweden_socken.json"
@@ -20,16 +20,14 @@ class SeShipSv(Monument):
         table = self.data_files["functions"]["mappings"]
         if self.funktion:
             special_type = self.funktion.lower()
-            try:
-                functions = [table[x]["items"]
-                             for x in table if x.lower() == special_type][0]
-                if len(functions) > 0:
-                    self.remove_statement("is")
-                    for f in functions:
-                        ref = self.wlm_source
-                        self.add_statement("is", f, refs=[ref])
-            except IndexError:
+            functions = utils.get_items_by_label(special_type, table)
+            if functions is None:
                 self.add_to_report("funktion", self.funktion)
+            elif len(functions) > 0:
+                self.remove_statement("is")
+                for f in functions:
+                    ref = self.wlm_source
+                    self.add_statement("is", f, refs=[ref])
 
     def set_shipyard(self):
         """
@@ -170,6 +168,7 @@ if __name__ == "__main__":
     """Command line entry point for importer."""
     args = importer.handle_args()
     dataset = Dataset("se-ship", "sv", SeShipSv)
+    dataset.id_column = "signal"
     dataset.data_files = {
         "functions": "se-ship_(sv)_functions.json"}
     importer.main(args, dataset)
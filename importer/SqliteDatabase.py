@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite database shared by the threads and processes of a run.
+
+SQLite connections must not be shared between processes, so each process
+opens its own the first time it uses the database, including processes
+forked after the database was opened. The threads of a process share its
+connection, one at a time. The database uses write-ahead logging, so
+that processes can read it while another one writes.
+"""
+import os
+import sqlite3
+import threading
+
+
+class SqliteDatabase(object):
+    """A per-process connection to a SQLite database."""
+
+    def connect(self):
+        """
+        Get the database connection of the current process.
+
+        The tables are created, if needed, when the connection is made.
+        Must be called with the lock held.
+        """
+        if self.connection is None or self.pid != os.getpid():
+            self.connection = sqlite3.connect(
+                self.filename, timeout=30, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "PRAGMA synchronous={}".format(self.synchronous))
+            self.connection.execute(self.schema)
+            self.connection.commit()
+            self.pid = os.getpid()
+        return self.connection
+
+    def fetchone(self, query, parameters=()):
+        """
+        Get the first row of a query.
+
+        :param query: the SELECT statement
+        :param parameters: the parameters of the statement
+        :return: the row as a tuple, or None if there is none
+        """
+        with self.lock:
+            return self.connect().execute(query, parameters).fetchone()
+
+    def execute(self, query, parameters=()):
+        """
+        Run a statement changing the database and commit it.
+
+        :param query: the statement
+        :param parameters: the parameters of the statement
+        """
+        with self.lock:
+            connection = self.connect()
+            connection.execute(query, parameters)
+            connection.commit()
+
+    def close(self):
+        """Close the connection of the current process, if any."""
+        with self.lock:
+            if self.connection is not None and self.pid == os.getpid():
+                self.connection.close()
+            self.connection = None
+
+    def __init__(self, filename, schema, synchronous="FULL"):
+        """
+        Initialize the database, which is opened when first used.
+
+        :param filename: path to the SQLite database, created if needed
+        :param schema: the CREATE TABLE IF NOT EXISTS statement of its
+            table
+        :param synchronous: how carefully writes are flushed to disk,
+            NORMAL is faster but may lose the latest writes if the
+            machine crashes
+        """
+        self.filename = filename
+        self.schema = schema
+        self.synchronous = synchronous
+        self.lock = threading.Lock()
+        self.connection = None
+        self.pid = None
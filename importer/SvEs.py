@@ -112,6 +112,8 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("sv", "es", SvEs)
+    dataset.id_column = "id"
+    dataset.article_columns = ["monumento_enlace", "monumento"]
     dataset.lookup_downloads = {"heritage_type": "sv_(es)/tipo"}
     dataset.data_files = {
         "departments": "salvador_departments.json",
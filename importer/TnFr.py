@@ -138,6 +138,7 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("tn", "fr", TnFr)
+    dataset.id_column = "id"
     dataset.data_files = {"admin": "tunisia_admin.json",
                           "settlements": "tunisia_settlements.json"}
     importer.main(args, dataset)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Token bucket limiting the rate of edits shared by several threads.
+
+Tokens are added at a steady rate, up to the size of the bucket, and each
+edit takes one. Edits that turn out to have cost more than one token can
+be charged afterwards, which delays the following ones. The bucket can
+also be paused, e.g. when the server asks clients to slow down.
+"""
+import threading
+import time
+
+
+class TokenBucket(object):
+    """A thread-safe token bucket."""
+
+    def refill(self, now):
+        """Add the tokens accumulated since the last refill."""
+        if self.rate:
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, tokens=1):
+        """
+        Wait until tokens are available and take them.
+
+        :param tokens: number of tokens to take, at most the capacity
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.refill(now)
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if not self.rate:
+                        return
+                    if self.tokens >= tokens:
+                        self.tokens -= tokens
+                        return
+                    wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def charge(self, tokens):
+        """
+        Take tokens without waiting.
+
+        The bucket can go into debt, which is paid back before the next
+        tokens are handed out.
+
+        :param tokens: number of tokens to take
+        """
+        with self.lock:
+            self.refill(time.monotonic())
+            self.tokens -= tokens
+
+    def pause(self, seconds):
+        """
+        Hand out no tokens for a while.
+
+        :param seconds: number of seconds to pause, from now
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until,
+                                    time.monotonic() + seconds)
+
+    def __init__(self, per_minute, capacity=1):
+        """
+        Initialize the bucket, full.
+
+        :param per_minute: number of tokens added per minute, None or 0
+            to not limit the rate
+        :param capacity: maximum number of tokens, i.e. the largest burst
+            allowed
+        """
+        self.rate = per_minute / 60 if per_minute else None
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent journal of the uploads of live runs.
+
+Each monument that is queued for upload gets an entry, keyed by the
+dataset and its monuments_all id, which is updated as soon as its item is
+created and when its upload is done. The entries are kept in a SQLite
+database which survives crashes of the run, so that a resumed run can
+skip the monuments that were already uploaded, and edit the items that
+were created for the others instead of creating them again.
+
+The data of each monument is hashed when its upload starts, so that the
+monuments that haven't changed since they were last uploaded can be
+skipped. The dates references were retrieved on, which change every day,
+are left out of the hash.
+"""
+import hashlib
+import json
+import time
+
+try:
+    from SqliteDatabase import SqliteDatabase
+except ImportError:  # imported as part of the importer package
+    from importer.SqliteDatabase import SqliteDatabase
+
+STARTED = "started"
+CREATED = "created"
+DONE = "done"
+
+# States of monuments compared to their last upload
+NEW = "new"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+
+VOLATILE_PROPS = ("P813",)  # retrieved
+
+SCHEMA = ("CREATE TABLE IF NOT EXISTS uploads ("
+          "dataset TEXT, "
+          "monument_id TEXT, "
+          "state TEXT, "
+          "qid TEXT, "
+          "edits INTEGER, "
+          "hash TEXT, "
+          "run_id TEXT, "
+          "updated REAL, "
+          "created_qid TEXT, "
+          "PRIMARY KEY (dataset, monument_id))")
+
+
+class UploadJournal(object):
+    """A SQLite backed record of the monuments uploaded."""
+
+    def make_canonical(self, data):
+        """
+        Leave out the parts of the data of a monument that change daily.
+
+        These are the parts of references that have a volatile property,
+        i.e. the date the reference was retrieved.
+
+        :param data: the data, or a part of it
+        :return: a copy of the data without them
+        """
+        if isinstance(data, dict):
+            return {key: self.make_canonical(value)
+                    for key, value in data.items()
+                    if not (isinstance(value, dict) and
+                            value.get("prop") in VOLATILE_PROPS)}
+        if isinstance(data, list):
+            return [self.make_canonical(x) for x in data]
+        return data
+
+    def make_hash(self, wd_item):
+        """
+        Get the content hash of the data of a monument.
+
+        :param wd_item: the data to upload, i.e. Monument.wd_item
+        :return: the SHA-1 of its canonical JSON serialization
+        """
+        text = json.dumps(self.make_canonical(wd_item), sort_keys=True,
+                          ensure_ascii=False, separators=(",", ":"),
+                          default=str)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def get(self, monument_id):
+        """
+        Get the entry of a monument.
+
+        :param monument_id: the monuments_all id of the monument
+        :return: a dict with the state, qid, edits, hash, run_id and
+            created_qid, or None if the monument has no entry
+        """
+        columns = ("state", "qid", "edits", "hash", "run_id", "created_qid")
+        row = self.database.fetchone(
+            "SELECT {} FROM uploads "
+            "WHERE dataset = ? AND monument_id = ?".format(", ".join(columns)),
+            (self.dataset, monument_id))
+        if row is None:
+            return None
+        return dict(zip(columns, row))
+
+    def start(self, monument_id, content_hash):
+        """
+        Record that the upload of a monument has started.
+
+        The item previously created for it, if any, is kept.
+
+        :param monument_id: the monuments_all id of the monument, which
+            must not be empty
+        :param content_hash: the hash of its data, see make_hash()
+        """
+        if not monument_id:
+            raise ValueError("Cannot journal a monument without an id.")
+        self.database.execute(
+            "INSERT INTO uploads (dataset, monument_id, state, edits, hash, "
+            "run_id, updated) VALUES (?, ?, ?, 0, ?, ?, ?) "
+            "ON CONFLICT (dataset, monument_id) DO UPDATE SET "
+            "state = excluded.state, edits = 0, hash = excluded.hash, "
+            "run_id = excluded.run_id, updated = excluded.updated",
+            (self.dataset, monument_id, STARTED, content_hash, self.run_id,
+             time.time()))
+
+    def created(self, monument_id, qid):
+        """
+        Record the item created for a monument.
+
+        Only these items are reused by later uploads of the monument, not
+        the ones it was matched to.
+
+        :param monument_id: the monuments_all id of the monument
+        :param qid: the ID of the new item
+        """
+        self.database.execute(
+            "UPDATE uploads SET state = ?, qid = ?, created_qid = ?, "
+            "updated = ? WHERE dataset = ? AND monument_id = ?",
+            (CREATED, qid, qid, time.time(), self.dataset, monument_id))
+
+    def done(self, monument_id, qid, edits):
+        """
+        Record that a monument has been uploaded.
+
+        :param monument_id: the monuments_all id of the monument
+        :param qid: the ID of the item edited or created
+        :param edits: the number of edits made
+        """
+        self.database.execute(
+            "UPDATE uploads SET state = ?, qid = ?, edits = ?, updated = ? "
+            "WHERE dataset = ? AND monument_id = ?",
+            (DONE, qid, edits, time.time(), self.dataset, monument_id))
+
+    def start_upload(self, monument_id, wd_item, force=False):
+        """
+        Compare a monument to its last upload, and record it as started.
+
+        The monument is unchanged if it was uploaded with the same data.
+        It's changed if it was uploaded with other data, or if its upload
+        was not finished. If an item was created for the monument by a
+        previous run, it's edited instead of creating a new one. The items
+        the monument was matched to are not reused, since the match may
+        have been removed or rejected since.
+
+        :param monument_id: the monuments_all id of the monument, which
+            must not be empty
+        :param wd_item: the data to upload, i.e. Monument.wd_item, whose
+            wd-item is set to the item created before, if any
+        :param force: whether the monument will be uploaded even if
+            unchanged, in which case it's recorded as started anyway
+        :return: the state of the monument, NEW, CHANGED or UNCHANGED, and
+            the Qid of its item if it's unchanged and not forced
+        """
+        content_hash = self.make_hash(wd_item)
+        entry = self.get(monument_id)
+        if entry is None:
+            state = NEW
+        elif entry["state"] == DONE and entry["hash"] == content_hash:
+            state = UNCHANGED
+        else:
+            state = CHANGED
+        if state == UNCHANGED and not force:
+            return state, entry["qid"]
+        if entry is not None and entry["created_qid"]:
+            if wd_item["wd-item"] is None:
+                wd_item["wd-item"] = entry["created_qid"]
+        self.start(monument_id, content_hash)
+        return state, None
+
+    def close(self):
+        """Close the database connection."""
+        self.database.close()
+
+    def __init__(self, filename, dataset, run_id=None):
+        """
+        Initialize the journal of a dataset.
+
+        :param filename: path to the SQLite database, created if needed
+        :param dataset: name of the dataset, e.g. its table name
+        :param run_id: identifier of the run, recorded with the entries
+        """
+        self.filename = filename
+        self.dataset = dataset
+        self.run_id = run_id
+        self.database = SqliteDatabase(filename, SCHEMA)
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Scheduler of the uploads of processed monuments.
+
+Monuments are put in a bounded queue as soon as they are processed, and
+uploaded by a number of writer threads, each with its own upload session,
+so that processing and uploading overlap. The writers share a token
+bucket limiting the rate of edits. When the server reports that it is
+lagged or that the edit rate is too high, all the writers pause for a
+while, increasingly long, before the upload is retried.
+
+Errors of the writers are raised in the thread that submits the
+monuments, the next time it calls submit() or join().
+"""
+import queue
+import threading
+import time
+
+DEFAULT_WORKERS = 1
+QUEUE_SIZE = 50  # monuments per writer
+MAX_RETRIES = 5
+BACKOFF_BASE = 5  # seconds
+BACKOFF_MAX = 300  # seconds
+REPORT_INTERVAL = 60  # seconds
+THROTTLE_CODES = ("maxlag", "ratelimited")
+
+
+class UploadScheduler(object):
+    """Concurrent, rate limited uploader of monuments."""
+
+    def is_throttled(self, error):
+        """
+        Check if an error means that the server asks to slow down.
+
+        This is the case for maxlag and rate limit API errors, also when
+        wrapped in a save error, and for HTTP 429 responses.
+
+        :param error: the exception raised by the upload
+        """
+        if type(error).__name__ == "MaxlagTimeoutError":
+            return True
+        for e in (error, getattr(error, "reason", None)):
+            if getattr(e, "code", None) in THROTTLE_CODES:
+                return True
+            response = getattr(e, "response", None)
+            if getattr(response, "status_code", None) == 429:
+                return True
+        return False
+
+    def upload(self, uploader, monument):
+        """
+        Upload a monument, backing off while the server is throttling.
+
+        :param uploader: the upload session of the writer
+        :param monument: the monument to upload
+        :return: the result of the upload
+        """
+        retries = 0
+        while True:
+            self.bucket.take()
+            edits_before = getattr(uploader, "edit_count", 0)
+            try:
+                result = uploader.upload(monument)
+            except Exception as e:
+                if not self.is_throttled(e) or retries >= self.max_retries:
+                    raise
+                delay = min(self.backoff_base * 2 ** retries,
+                            self.backoff_max)
+                retries += 1
+                print("THROTTLED ({0}), WAITING {1} SECONDS".format(
+                    e, delay))
+                self.bucket.pause(delay)
+                continue
+            edits = getattr(uploader, "edit_count", 1) - edits_before
+            if edits != 1:
+                # one edit was paid for before uploading
+                self.bucket.charge(edits - 1)
+            return result, edits
+
+    def work(self):
+        """Upload the monuments put in the queue, until None is put in it."""
+        uploader = None
+        while True:
+            task = self.queue.get()
+            try:
+                if task is None:
+                    return
+                if self.error is not None or self.stopped:
+                    # a writer has failed or the run is over, drop the rest
+                    continue
+                monument, callback = task
+                if uploader is None:
+                    uploader = self.make_uploader()
+                result, edits = self.upload(uploader, monument)
+                with self.lock:
+                    if result is not None:
+                        self.uploaded += 1
+                    self.edits += edits
+                    if callback is not None:
+                        callback(result)
+                    if time.time() - self.last_report >= self.report_interval:
+                        self.report()
+            except BaseException as e:
+                # including the SystemExit of failed uploads
+                with self.lock:
+                    if self.error is None:
+                        self.error = e
+            finally:
+                self.queue.task_done()
+
+    def raise_error(self):
+        """Raise the error of a writer, if any has failed."""
+        if self.error is not None:
+            raise self.error
+
+    def submit(self, monument, callback=None):
+        """
+        Queue a monument for upload.
+
+        Waits if the queue is full.
+
+        :param monument: the monument to upload
+        :param callback: function called with the result of the upload,
+            e.g. the Q-id of the item, or None if it was not uploaded.
+            The callbacks are called one at a time, from the writer
+            threads.
+        """
+        self.raise_error()
+        self.queue.put((monument, callback))
+
+    def skip(self, result, callback):
+        """
+        Finish a monument that doesn't need to be uploaded.
+
+        The callback is called right away, but one at a time with those
+        of the uploaded monuments.
+
+        :param result: the result to call the callback with, as if the
+            monument had been uploaded
+        :param callback: function called with the result
+        """
+        self.raise_error()
+        with self.lock:
+            callback(result)
+
+    def join(self):
+        """Wait until all the queued monuments are uploaded."""
+        self.queue.join()
+        self.raise_error()
+
+    def get_edit_rate(self):
+        """Get the number of edits per minute since the start."""
+        minutes = (time.time() - self.started) / 60
+        return self.edits / minutes if minutes else 0
+
+    def report(self):
+        """Print the number of uploads and the rate of edits."""
+        print("UPLOADED {0} MONUMENTS, {1} EDITS ({2:.1f} EDITS/MIN)".format(
+            self.uploaded, self.edits, self.get_edit_rate()))
+        self.last_report = time.time()
+
+    def close(self):
+        """
+        Stop the writers.
+
+        The uploads in progress are finished, but the monuments still in
+        the queue are dropped, use join() before to upload them. Errors
+        of the writers are not raised.
+        """
+        self.stopped = True
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def __init__(self,
+                 make_uploader,
+                 bucket,
+                 workers=DEFAULT_WORKERS,
+                 queue_size=None,
+                 max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE,
+                 backoff_max=BACKOFF_MAX,
+                 report_interval=REPORT_INTERVAL):
+        """
+        Initialize the scheduler and start the writers.
+
+        :param make_uploader: function making an upload session, with an
+            upload(monument) method, called once by each writer
+        :param bucket: TokenBucket shared by the writers, one token is
+            taken per edit. If the upload session has an edit_count, the
+            edits made by each upload are charged, otherwise one per
+            upload.
+        :param workers: number of writer threads, at least 1
+        :param queue_size: maximum number of monuments waiting to be
+            uploaded, by default 50 per writer
+        :param max_retries: number of times to retry a throttled upload
+        :param backoff_base: number of seconds to pause after the first
+            throttled upload, doubled for each retry
+        :param backoff_max: maximum number of seconds to pause
+        :param report_interval: number of seconds between the reports of
+            the edit rate
+        """
+        if workers < 1:
+            raise ValueError("At least one writer is needed.")
+        self.make_uploader = make_uploader
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.report_interval = report_interval
+        self.queue = queue.Queue(queue_size or QUEUE_SIZE * workers)
+        self.lock = threading.Lock()
+        self.error = None
+        self.stopped = False
+        self.uploaded = 0
+        self.edits = 0
+        self.started = time.time()
+        self.last_report = self.started
+        self.threads = []
+        for _ in range(workers):
+            thread = threading.Thread(target=self.work)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
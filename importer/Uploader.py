@@ -1,12 +1,14 @@
 from wikidataStuff.WikidataStuff import WikidataStuff as WDS
 import pywikibot
 import importer_utils as utils
+from EntityDiff import EntityDiff
 from os import path
 import sys
 
 MAPPING_DIR = "mappings"
 PROPS = utils.load_json(path.join(MAPPING_DIR, "props_general.json"))
 P31_BLACKLIST = utils.load_json(path.join(MAPPING_DIR, "P31_blacklist.json"))
+P31_BLACKLIST_ITEMS = frozenset(x["item"] for x in P31_BLACKLIST)
 
 
 class Uploader(object):
@@ -15,16 +17,19 @@ class Uploader(object):
 
     def add_labels(self, target_item, labels, log):
         """Add labels and aliases."""
+        revision = self.get_revision(target_item)
         self.wdstuff.add_multiple_label_or_alias(labels, target_item)
+        self.count_edit(target_item, revision)
         if log:
             t_id = target_item.getID()
             message = "{} ADDED LABELS {}".format(t_id, labels)
-            log.logit(message)
+            log.logit(message, item=t_id, action="labels")
 
     def add_descriptions(self, target_item, descriptions, log,
                          disambiguated=None):
         """Add descriptions."""
         disambiguated = disambiguated or []
+        revision = self.get_revision(target_item)
         try:
             self.wdstuff.add_multiple_descriptions(descriptions, target_item)
         except pywikibot.exceptions.OtherPageSaveError as e:
@@ -36,10 +41,11 @@ class Uploader(object):
             else:
                 raise
         else:
+            self.count_edit(target_item, revision)
             if log:
                 t_id = target_item.getID()
                 message = "{} ADDED DESCRIPTIONS {}".format(t_id, descriptions)
-                log.logit(message)
+                log.logit(message, item=t_id, action="descriptions")
 
     def add_disambiguators_to_descriptions(self, descriptions, pwb_error,
                                            disambiguated):
@@ -60,6 +66,9 @@ class Uploader(object):
             return None
 
         lang = pwb_error.reason.other.get('messages')[0].get('parameters')[1]
+        if lang not in descriptions:
+            # the conflict is not caused by a description being added
+            return None
         if lang in disambiguated:
             # this language was already disambiguated
             return None
@@ -127,13 +136,21 @@ class Uploader(object):
         return pywikibot.WbTime(**value)
 
     def make_q_item(self, q_number):
-        """Create a regular Item, if target is not a disambiguation."""
-        q_item = None
-        disambiguation_page = "Q4167410"
-        instances = utils.get_P31(q_number, self.repo)
-        q_item = self.wdstuff.QtoItemPage(q_number)
+        """
+        Create a regular Item, if target is not a disambiguation.
 
-        if (disambiguation_page in instances or
+        Targets that have been checked are remembered for the rest of
+        the session.
+        """
+        disambiguation_page = "Q4167410"
+        q_item = self.target_items.get(q_number)
+        if q_item is None:
+            instances = utils.get_P31(q_number, self.repo)
+            q_item = self.wdstuff.QtoItemPage(q_number)
+            if disambiguation_page not in instances:
+                self.target_items[q_number] = q_item
+
+        if (q_number not in self.target_items or
            (self.wd_item_q and self.wd_item_q == q_item)):
             mes = "{} cannot be added to {} as target of claim. Exiting."
             sys.exit(mes.format(q_item, self.wd_item_q))
@@ -159,6 +176,21 @@ class Uploader(object):
         else:
             return False
 
+    def exists_on_commons(self, name, check):
+        """
+        Check if a file or category exists on Commons.
+
+        The result is remembered for the rest of the session.
+
+        :param name: name of the file or category
+        :param check: the function to check it with, i.e.
+            utils.file_is_on_commons or utils.commonscat_exists
+        """
+        key = (check.__name__, name)
+        if key not in self.commons_pages:
+            self.commons_pages[key] = check(name)
+        return self.commons_pages[key]
+
     def make_pywikibot_item(self, value, prop=None):
         val_item = None
         if type(value) is list and len(value) == 1:
@@ -167,7 +199,7 @@ class Uploader(object):
             val_item = self.make_q_item(value)
         elif prop == PROPS["image"]:
             if not self.item_has_prop("image", self.wd_item) and \
-                    utils.file_is_on_commons(value):
+                    self.exists_on_commons(value, utils.file_is_on_commons):
                 val_item = self.make_image_item(value)
         elif utils.tuple_is_coords(value) and prop == PROPS["coordinates"]:
             # Don't upload coords if item already has one.
@@ -180,7 +212,8 @@ class Uploader(object):
             val_item = self.make_time_item(value, self.repo)
         elif isinstance(value, dict) and 'monolingual_value' in value:
             val_item = self.make_monolingual_item(value)
-        elif prop == PROPS["commonscat"] and utils.commonscat_exists(value):
+        elif (prop == PROPS["commonscat"] and
+                self.exists_on_commons(value, utils.commonscat_exists)):
             val_item = value
         else:
             val_item = value.strip() if value else None
@@ -222,6 +255,24 @@ class Uploader(object):
                     prop_date, date_item))
         return ref
 
+    def make_reference(self, refs):
+        """
+        Create the reference of a claim.
+
+        Only the last of the references is used.
+
+        :param refs: list of reference urls or "stated in" dicts
+        """
+        for ref in refs:
+            # This only works if it's a url.
+            # If we have references of different sort,
+            # this will have to be appended.
+            if utils.is_valid_url(ref):
+                ref = self.make_url_reference(ref)
+            else:
+                ref = self.make_stated_in_reference(ref)
+        return ref
+
     def add_claims(self, wd_item, claims, log):
         if wd_item:
             for claim in claims:
@@ -246,45 +297,202 @@ class Uploader(object):
                                     quals[qual], qual)
                                 qualifier = self.wdstuff.Qualifier(qual, value)
                                 wd_value.addQualifier(qualifier)
-                        for ref in refs:
-                            # This only works if it's a url.
-                            # If we have references of different sort,
-                            # this will have to be appended.
-                            if utils.is_valid_url(ref):
-                                ref = self.make_url_reference(ref)
-                            else:
-                                ref = self.make_stated_in_reference(ref)
+                        if refs:
+                            ref = self.make_reference(refs)
                         if wd_value:
+                            revision = self.get_revision(wd_item)
                             self.wdstuff.addNewClaim(
                                 prop, wd_value, wd_item, ref)
+                            self.count_edit(wd_item, revision)
                             if log:
                                 t_id = wd_item.getID()
                                 message = "{} ADDED CLAIM {}".format(
                                     t_id, prop)
-                                log.logit(message)
+                                log.logit(message, item=t_id,
+                                          action="claim", property=prop)
 
-    def create_new_item(self, log):
-        item = self.wdstuff.make_new_item({}, self.summary)
+    def make_claim(self, prop, target, is_qualifier=False):
+        """
+        Create a claim that isn't on any item yet.
+
+        :param prop: the property, e.g. P31
+        :param target: the value, as made by make_pywikibot_item()
+        :param is_qualifier: whether the claim is a qualifier
+        """
+        claim = pywikibot.Claim(self.repo, prop, is_qualifier=is_qualifier)
+        claim.setTarget(target)
+        return claim
+
+    def copy_claim(self, claim):
+        """Copy a claim, so that it can be changed without editing it."""
+        return pywikibot.Claim.fromJSON(self.repo, claim.toJSON())
+
+    def add_claim_data(self, diff, claims):
+        """
+        Add the new and updated claims of an item to its difference.
+
+        New values become new claims. Values the item already has get
+        their qualifiers and reference added to the existing claim if
+        missing, as with add_claims().
+
+        :param diff: the EntityDiff of the item
+        :param claims: dict of property: list of values, as in the
+            statements of a Monument
+        """
+        for prop, values in claims.items():
+            for x in values:
+                # including the claims added by this edit
+                if x.get("if_empty") and diff.get_claims(prop):
+                    continue
+                if x["value"] == "":
+                    continue
+                target = self.make_pywikibot_item(x["value"], prop)
+                if target is None:
+                    continue
+                quals = {}
+                for qual, qual_value in x["quals"].items():
+                    qual_target = self.make_pywikibot_item(qual_value, qual)
+                    if qual_target is not None:
+                        quals[qual] = qual_target
+                source_test = source_notest = None
+                if x["refs"]:
+                    ref = self.make_reference(x["refs"])
+                    source_test = ref.source_test
+                    source_notest = ref.source_notest
+                diff.add_claim(prop, target, quals, source_test, source_notest)
+
+    def edit_entity(self, wd_item, data, disambiguated=None):
+        """
+        Save changes to an item in a single edit.
+
+        If a description conflicts with another item's, a disambiguator
+        is added to it and the edit is retried, as with
+        add_descriptions().
+
+        :param wd_item: the item to edit
+        :param data: the changes, as sent with wbeditentity
+        :param disambiguated: list of previously disambiguated languages
+        """
+        disambiguated = disambiguated or []
+        revision = self.get_revision(wd_item)
+        try:
+            wd_item.editEntity(data, summary=self.summary)
+            self.count_edit(wd_item, revision)
+        except pywikibot.exceptions.OtherPageSaveError as e:
+            new_desc = None
+            if data.get("descriptions"):
+                new_desc = self.add_disambiguators_to_descriptions(
+                    data["descriptions"], e, disambiguated)
+            if new_desc:
+                data["descriptions"] = new_desc
+                self.edit_entity(wd_item, data, disambiguated)
+            else:
+                raise
+
+    def get_revision(self, wd_item):
+        """Get the latest revision of an item, None if not created yet."""
+        if wd_item.getID() == "-1":
+            return None
+        return wd_item.latest_revision_id
+
+    def count_edit(self, wd_item, revision):
+        """
+        Count an edit call if it saved a new revision of the item.
+
+        WikidataStuff saves nothing for the labels, descriptions and
+        claims an item already has, so a call is counted when it has
+        changed the latest revision of the item. The qualifiers and
+        reference it adds to a claim are counted with the claim.
+
+        :param wd_item: the item edited
+        :param revision: the latest revision of the item before the call
+        """
+        if self.get_revision(wd_item) != revision:
+            self.edit_count += 1
+
+    def upload_entity(self):
+        """
+        Upload the labels, descriptions and claims in a single edit.
+
+        The planned data is compared to the current item and only what
+        it lacks is sent, in one wbeditentity call instead of one edit
+        per label, description, claim, qualifier and reference.
+        A new item is created with all of its data in that call.
+        """
+        wd_item = self.wd_item
+        diff = EntityDiff(wd_item, self.make_claim, self.copy_claim)
+        diff.add_labels(self.data["labels"], self.data["aliases"])
+        diff.add_descriptions(self.data["descriptions"])
+        self.add_claim_data(diff, self.data["statements"])
+        data = diff.get_data()
+        if not data:
+            return
+        if self.wd_item_q is None:
+            self.create_new_item(data, self.log)
+            return
+        self.edit_entity(wd_item, data)
+        if self.log:
+            t_id = wd_item.getID()
+            counts = diff.get_counts()
+            message = ("{} EDITED ENTITY: {labels} LABELS, {aliases} "
+                       "ALIASES, {descriptions} DESCRIPTIONS, {claims} "
+                       "CLAIMS".format(t_id, **counts))
+            self.log.logit(message, item=t_id, action="entity", **counts)
+
+    def create_new_item(self, data, log):
+        """
+        Create the new item with its content.
+
+        :param data: the content of the item, as sent with wbeditentity
+        :param log: Logger to log the creation to, if any
+        """
+        self.edit_entity(self.wd_item, data)
+        self.wd_item_q = self.wd_item.getID()
+        if self.journal and self.monument_id:
+            self.journal.created(self.monument_id, self.wd_item_q)
         if log:
-            t_id = item.getID()
+            t_id = self.wd_item_q
             message = "{} CREATE".format(t_id)
-            log.logit(message)
-        return item
+            log.logit(message, item=t_id, action="create")
 
     def get_username(self):
         """Get Wikidata login that will be used to upload."""
         return pywikibot.config.usernames["wikidata"]["wikidata"]
 
-    def upload(self):
+    def upload(self, monument_object):
+        """
+        Upload a Monument.
+
+        :param monument_object: the Monument to upload
+        :return: the Q-id of the item edited or created, None if the
+            Monument was not uploaded
+        """
+        self.allow_upload = monument_object.upload
+        self.data = monument_object.wd_item
+        self.monument_id = monument_object.monuments_all_id
+        self.set_wd_item()
         if not self.allow_upload:
             print("SKIPPING ITEM")
-            return
-        claims = self.data["statements"]
-        labels = self.data["labels"]
-        descriptions = self.data["descriptions"]
-        self.add_labels(self.wd_item, labels, self.log)
-        self.add_descriptions(self.wd_item, descriptions, self.log)
-        self.add_claims(self.wd_item, claims, self.log)
+            return None
+        edits_before = self.edit_count
+        if self.batch or self.wd_item_q is None:
+            self.upload_entity()
+        else:
+            claims = self.data["statements"]
+            labels = self.data["labels"]
+            descriptions = self.data["descriptions"]
+            self.add_labels(self.wd_item, labels, self.log)
+            self.add_descriptions(self.wd_item, descriptions, self.log)
+            self.add_claims(self.wd_item, claims, self.log)
+        if self.journal and self.monument_id:
+            self.journal.done(self.monument_id, self.wd_item_q,
+                              self.edit_count - edits_before)
+        return self.wd_item_q
+
+    def set_new_item(self):
+        """Prepare an empty item, which is created when uploading."""
+        self.wd_item = pywikibot.ItemPage(self.repo)
+        self.wd_item_q = None
 
     def set_wd_item(self):
         """
@@ -292,7 +500,8 @@ class Uploader(object):
 
         In live mode, if data object has associated WD item,
         check whether it doesn't have a disallowed P31,
-        and if it doesn't edit it. Otherwise, create a new WD item.
+        and if it doesn't edit it. Otherwise, create a new WD item
+        when uploading, with all of its content in one edit.
         In sandbox mode, all edits are done on the WD Sandbox item.
         """
         if not self.allow_upload:
@@ -300,22 +509,20 @@ class Uploader(object):
             self.wd_item_q = None
         elif self.live:
             if self.data["wd-item"] is None:
-                self.wd_item = self.create_new_item(self.log)
-                self.wd_item_q = self.wd_item.getID()
+                self.set_new_item()
             else:
-                disallowed = [x["item"] for x in P31_BLACKLIST]
                 item_q = self.data["wd-item"]
                 right_country = utils.is_right_country(
                     item_q, self.repo, self.data["country"])
-                if (utils.is_blacklisted_P31(item_q, self.repo, disallowed) or
+                if (utils.is_blacklisted_P31(
+                        item_q, self.repo, P31_BLACKLIST_ITEMS) or
                         not right_country):
                     if self.log:
                         message = (
                             "{} -- SET AS WD-ITEM BUT POSSIBLY WRONG AND "
                             "THUS REMOVED".format(item_q))
-                        self.log.logit(message)
-                    self.wd_item = self.create_new_item(self.log)
-                    self.wd_item_q = self.wd_item.getID()
+                        self.log.logit(message, item=item_q, action="reject")
+                    self.set_new_item()
                 else:
                     self.wd_item = self.wdstuff.QtoItemPage(item_q)
                     self.wd_item_q = item_q
@@ -324,24 +531,30 @@ class Uploader(object):
             self.wd_item_q = self.TEST_ITEM
 
     def __init__(self,
-                 monument_object,
                  repo,
                  log=None,
                  tablename=None,
-                 live=False):
+                 live=False,
+                 batch=False,
+                 journal=None):
         """
-        Initialize an Upload object for a single Monument.
+        Initialize an upload session, used for all the Monuments of a run.
 
-        :param monument_object: Dictionary of Monument data
         :param repo: Data repository of site to work on (Wikidata)
         :param log: Enable logging to file
         :param tablename: Name of db table, used in edit summary
         :param live: Whether to work on real WD items or in the sandbox
+        :param batch: Whether to upload all the changes to the item in a
+            single edit
+        :param journal: Optional UploadJournal to record the items created
+            and the Monuments uploaded in
         """
         self.repo = repo
         self.log = False
         self.summary = "#COH #WLM #{}".format(tablename)
         self.live = live
+        self.batch = batch
+        self.journal = journal
         print("User: {}".format(self.get_username()))
         print("Edit summary: {}".format(self.summary))
         if self.live:
@@ -351,7 +564,12 @@ class Uploader(object):
         print("---------------")
         if log is not None:
             self.log = log
-        self.allow_upload = monument_object.upload
-        self.data = monument_object.wd_item
         self.wdstuff = WDS(self.repo, edit_summary=self.summary, no_wdss=True)
-        self.set_wd_item()
+        self.target_items = {}
+        self.commons_pages = {}
+        self.edit_count = 0
+        self.allow_upload = False
+        self.data = None
+        self.monument_id = None
+        self.wd_item = None
+        self.wd_item_q = None
@@ -125,6 +125,7 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("uy", "es", UyEs)
+    dataset.id_column = "id"
     dataset.data_files = {
         "departments": "uruguay_departments.json",
         "settlements": "uruguay_settlements.json"
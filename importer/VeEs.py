@@ -97,6 +97,8 @@ if __name__ == "__main__":
     """Command line entry point for importer."""
     args = importer.handle_args()
     dataset = Dataset("ve", "es", VeEs)
+    dataset.id_column = "id"
+    dataset.article_columns = ["monumento_enlace", "monumento"]
     dataset.data_files = {
         "states": "venezuela_states.json",
         "settlements": "venezuela_settlements.json"
@@ -90,6 +90,7 @@ if __name__ == "__main__":
     """Point of entrance for importer."""
     args = importer.handle_args()
     dataset = Dataset("xk", "sq", XkSq)
+    dataset.id_column = "idno"
     dataset.data_files = {"settlements": "kosovo_settlements.json"}
     dataset.lookup_downloads = {"municipalities": "xk (sq)/municipalities",
                                 "categories": "xk (sq)/category"}
@@ -1,18 +1,45 @@
 from Uploader import *
 from Logger import *
 import LookupTable as Lt
+from EntityCache import EntityCache
+from KnownItems import KnownItems
+from IndexedTable import IndexedTable
+from LookupMappings import LookupMappings
+from ReportWriter import ReportWriter
+from LineWriter import LineWriter
+from PreviewWriter import PreviewWriter
+from TokenBucket import TokenBucket
+from UploadScheduler import UploadScheduler
+from UploadJournal import UploadJournal, NEW, CHANGED, UNCHANGED
 from os import path
+import os
+import random
+import functools
 import argparse
+import pywikibot
+import multiprocessing
 import pymysql
 import wikidataStuff.wdqsLookup as lookup
 import importer_utils as utils
 
 DEFAULT_SHORT = 10
+DEFAULT_BATCH = 500
+DEFAULT_EDITS_PER_MINUTE = 60
+MAX_SEED = 2 ** 31 - 1
+STREAM_WRITE_TIMEOUT = 3600
 MAPPING_DIR = "mappings"
 REPORTING_DIR = "reports"
 PREVIEW_DIR = "previews"
+CHECKPOINT_DIR = "checkpoints"
+CACHE_DIR = "cache"
 MONUMENTS_ALL = "monuments_all"
 
+# Data files loaded so far, see load_mapping_file()
+mapping_files = {}
+
+# Context inherited by the worker processes, see make_worker_pool()
+worker_context = {}
+
 
 class Mapping(object):
 
@@ -30,21 +57,6 @@ class Mapping(object):
             return self.file_content["unique"]["property"]
 
 
-def make_query(specific_table, offset):
-    """
-    Generate a query to retrieve data from database.
-
-    :param specific_table: Name of table to retrieve data from.
-    :param offset: Optional offset to start from.
-    """
-    query = 'select DISTINCT * from `{}`'.format(specific_table)
-    if isinstance(offset, int):
-        unlimited = "18446744073709551615"
-        # workaround for MySQL requiring a limit when using offset
-        query += " LIMIT {}, {};".format(str(offset), unlimited)
-    return query
-
-
 def make_count_query(specific_table):
     return ("SELECT COUNT(*) FROM `{}`").format(specific_table)
 
@@ -69,15 +81,134 @@ def print_row_count(tablename, connection):
     print(("TABLE {} HAS {} ROWS.").format(tablename, rowcount))
 
 
-def select_query(query, connection):
+def select_query(query, connection, params=None):
     cursor = connection.cursor(pymysql.cursors.DictCursor)
-    cursor.execute(query)
+    cursor.execute(query, params)
     result = cursor.fetchall()
     return result
 
 
+def select_query_stream(query, connection, batch_size=DEFAULT_BATCH,
+                        params=None):
+    """
+    Yield the results of a query in batches of rows.
+
+    Uses an unbuffered server-side cursor, so only the current batch
+    is kept in memory, however big the table is. The connection cannot
+    be used for other queries until all the batches have been consumed.
+
+    Since the server waits for us to read each batch, the write timeout is
+    raised to allow for slow processing (e.g. uploads) between batches.
+
+    :param query: Query to run.
+    :param connection: Connection used to access the database.
+    :param batch_size: Maximum number of rows in each batch.
+    :param params: Optional parameters of the query.
+    """
+    timeout_query = "SET SESSION net_write_timeout = {}".format(
+        STREAM_WRITE_TIMEOUT)
+    connection.cursor().execute(timeout_query)
+    cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+    try:
+        cursor.execute(query, params)
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+    finally:
+        cursor.close()
+
+
+def select_query_keyset(connection, specific_table, id_column,
+                        batch_size=DEFAULT_BATCH, start_key=None,
+                        offset=None, since=None):
+    """
+    Yield all rows of a table in chunks, paginating on a unique column.
+
+    Each chunk is a separate query starting after the last key of the
+    previous chunk, so a run can be resumed from any of these keys.
+
+    :param connection: Connection used to access the database.
+    :param specific_table: Name of table to retrieve data from.
+    :param id_column: Unique column to order and page by.
+    :param batch_size: Maximum number of rows in each chunk.
+    :param start_key: Optional key to continue after.
+    :param offset: Optional number of rows to skip.
+    :param since: Optional time to only retrieve the rows changed after.
+    """
+    last_key = start_key
+    while True:
+        query = utils.make_keyset_query(
+            specific_table, id_column, last_key, batch_size, offset, since)
+        params = [x for x in (last_key, since) if x is not None] or None
+        batch = select_query(query, connection, params)
+        if not batch:
+            break
+        yield batch
+        if len(batch) < batch_size:
+            break
+        last_key = batch[-1][id_column]
+        offset = None
+
+
+def make_checkpoint_filename(tablename):
+    """Construct the filename of the resume checkpoint for a table."""
+    utils.create_dir(CHECKPOINT_DIR)
+    return path.join(CHECKPOINT_DIR, "{}.json".format(tablename))
+
+
+def load_checkpoint(filename):
+    """
+    Get the last committed key from a checkpoint file.
+
+    :param filename: path to the checkpoint file
+    :return: the key, or None if there is no checkpoint
+    """
+    if path.isfile(filename):
+        return utils.load_json(filename)["last_key"]
+
+
+def save_checkpoint(filename, last_key, rows):
+    """
+    Save the key of the last fully processed row.
+
+    The file is replaced atomically so that a crash while writing
+    never leaves a broken checkpoint behind.
+
+    :param filename: path to the checkpoint file
+    :param last_key: value of the id column of the last processed row
+    :param rows: number of rows processed so far in this run
+    """
+    tmp_filename = filename + ".tmp"
+    utils.json_to_file(tmp_filename,
+                       {"last_key": last_key,
+                        "rows": rows,
+                        "timestamp": utils.get_current_timestamp()},
+                       silent=True)
+    os.replace(tmp_filename, filename)
+
+
+def make_watermark_filename(tablename):
+    """Construct the filename of the changed watermark of a table."""
+    utils.create_dir(CHECKPOINT_DIR)
+    return path.join(CHECKPOINT_DIR, "{}_watermark.json".format(tablename))
+
+
+def get_last_change(tablename, connection):
+    """
+    Get the latest value of the changed column of a table.
+
+    :param tablename: Name of table to look in.
+    :param connection: Connection used to access the database.
+    :return: the value, or None if the table is empty
+    """
+    query = utils.make_last_change_query(tablename)
+    return select_query(query, connection)[0]["last_change"]
+
+
 def get_wd_items_using_prop(prop):
-    items = {}
+    items = KnownItems()
     print("WILL NOW DOWNLOAD WD ITEMS THAT USE " + prop)
     query = (
         "SELECT DISTINCT ?item ?value "
@@ -124,16 +255,50 @@ def make_filenames(tablename, timestamp):
     return filenames
 
 
+def load_mapping_file(filename):
+    """
+    Load a data file from the mappings directory.
+
+    Each file is only decoded once per process, after that the same object
+    is returned to every dataset using it, so it must not be modified.
+    Files with lists of dicts are loaded as IndexedTables, to be searched
+    with utils.get_item_from_dict_by_key(). Offline lookup tables get
+    their mappings indexed as online ones, see index_lookup_table().
+
+    :param filename: name of the file in the mappings directory
+    """
+    if filename not in mapping_files:
+        json_path = path.join(MAPPING_DIR, filename)
+        data = utils.load_json(json_path)
+        if isinstance(data, list) and all(isinstance(x, dict) for x in data):
+            data = IndexedTable(data)
+        elif isinstance(data, dict) and isinstance(data.get("mappings"), dict):
+            data = index_lookup_table(data)
+        mapping_files[filename] = data
+        print("Loaded offline data file: {}".format(json_path))
+    return mapping_files[filename]
+
+
 def load_data_files(dataset):
     """Load offline data files as specified in the dataset."""
     file_dict = dataset.data_files
     for key in file_dict.keys():
-        json_path = path.join(MAPPING_DIR, file_dict[key])
-        file_dict[key] = utils.load_json(json_path)
-        print("Loaded offline data file: {}".format(json_path))
+        file_dict[key] = load_mapping_file(file_dict[key])
     return file_dict
 
 
+def index_lookup_table(lookup_json):
+    """
+    Index the labels of a lookup table.
+
+    :param lookup_json: lookup table as made by LookupTable
+    :return: the same table, with the mappings as LookupMappings so that
+        utils.get_items_by_label() doesn't have to search them
+    """
+    lookup_json["mappings"] = LookupMappings(lookup_json["mappings"])
+    return lookup_json
+
+
 def load_data(dataset):
     """
     Get data files necessary for mappings.
@@ -150,47 +315,253 @@ def load_data(dataset):
         for l_title, l_path in dataset.lookup_downloads.items():
             lookup_table = Lt.LookupTable(l_path)
             lookup_json = lookup_table.convert_page_to_json_table()
-            data_files[l_title] = lookup_json
+            data_files[l_title] = index_lookup_table(lookup_json)
             print("Loaded online data: {}".format(l_path))
+    dataset.monument_class.prepare_data_files(data_files)
     return data_files
 
 
 def load_static_data():
     """Get static data files shared by all countries."""
     return {
-        "props": utils.load_json(
-            path.join(MAPPING_DIR, "props_general.json")),
-        "adm0": utils.load_json(path.join(MAPPING_DIR, "adm0.json")),
-        "sources": utils.load_json(
-            path.join(MAPPING_DIR, "data_sources.json")),
-        "common_items": utils.load_json(
-            path.join(MAPPING_DIR, "common_items.json"))
+        "props": load_mapping_file("props_general.json"),
+        "adm0": load_mapping_file("adm0.json"),
+        "sources": load_mapping_file("data_sources.json"),
+        "common_items": load_mapping_file("common_items.json")
     }
 
 
+def prefetch_links(dataset, rows, workers=utils.PREFETCH_WORKERS):
+    """
+    Look up the WD items of the wp pages linked from upcoming rows.
+
+    This collects the wikilinks in all the columns, as well as the titles in
+    the dataset's article columns, and resolves them concurrently. When the
+    Monuments are then created their lookups are answered from the cache.
+
+    :param dataset: The Database instance the rows belong to.
+    :param rows: Database rows to prefetch the links of.
+    :param workers: Maximum number of simultaneous lookups.
+    """
+    page_titles = []
+    for row in rows:
+        for column, value in row.items():
+            if not isinstance(value, str):
+                continue
+            if "[[" in value:
+                page_titles.extend(
+                    link.title for link in utils.get_wikilinks(value))
+            if column in dataset.article_columns and "#" not in value:
+                page_titles.append(value)
+    utils.prefetch_wikipedia_items(dataset.language, page_titles, workers)
+
+
+def prefetch_candidate_items(dataset, rows, site,
+                             workers=utils.PREFETCH_WORKERS):
+    """
+    Load the claims of the WD items that upcoming rows may be matched to.
+
+    The candidates are the items given in the wd_item column and the items
+    of the pages in the article columns, as found by prefetch_links().
+    Their claims are downloaded in bulk into the entity cache, so that the
+    blacklist and country checks of the Monuments and the Uploader don't
+    have to load them one by one.
+
+    :param dataset: The Database instance the rows belong to.
+    :param rows: Database rows to prefetch the candidates of.
+    :param site: The Wikidata site.
+    :param workers: Maximum number of simultaneous downloads.
+    """
+    candidates = []
+    for row in rows:
+        candidates.append(row.get("wd_item"))
+        for column in dataset.article_columns:
+            value = row.get(column)
+            if isinstance(value, str) and "#" not in value:
+                candidates.append(utils.get_cached_q_from_wikipedia(
+                    dataset.language, value))
+    utils.prefetch_entities(
+        [q for q in candidates if isinstance(q, str)], site, workers)
+
+
+def process_row(row, context):
+    """
+    Create the Monument for a database row and collect its output.
+
+    :param row: Database row to process.
+    :param context: Dictionary with the dataset, mapping, data_files,
+        existing and wikidata_site shared by all rows, as well as the
+        table and list_matches settings.
+    :return: the Monument and a dictionary of the output of the row needed
+        for the problem reports, skipped items, table and list of matches.
+    """
+    monument = context["dataset"].monument_class(
+        row,
+        context["mapping"],
+        context["data_files"],
+        context["existing"],
+        context["wikidata_site"])
+    result = {
+        "report": monument.get_report(),
+        "skipped": None,
+        "table": None,
+        "matches": None}
+    if not monument.upload:
+        result["skipped"] = format_skipped_item(monument)
+    if context["table"]:
+        raw_data = "<pre>" + str(row) + "</pre>\n"
+        result["table"] = (raw_data, monument.print_wd_to_table())
+    if context["list_matches"]:
+        result["matches"] = monument.get_matched_item_p31s()
+    return monument, result
+
+
+def process_row_in_worker(row):
+    """
+    Process a row in a worker process, using the context it inherited.
+
+    The lookups and changes the row makes in the worker's copy of the
+    existing items are recorded, to be merged by merge_worker_result().
+    """
+    existing = worker_context["existing"]
+    if existing is not None:
+        existing.start_recording()
+    monument, result = process_row(row, worker_context)
+    if existing is not None:
+        result["known_items"] = existing.stop_recording()
+    return result
+
+
+def merge_worker_result(row, result, context):
+    """
+    Merge the existing items matched by a row in a worker process.
+
+    Called in the parent process in the order of the rows, so that items
+    matched by one row are known to all the following rows, as when they
+    are processed in a single process. If the existing items known to the
+    worker differed from those now known in the parent, e.g. because an
+    earlier row matched the same item in another worker, the row is
+    processed again in the parent.
+
+    :param row: Database row processed.
+    :param result: The output of the row made by process_row_in_worker().
+    :param context: The context passed to process_row().
+    :return: the Monument if the row was processed again, otherwise
+        None, and the output of the row
+    """
+    record = result.pop("known_items", None)
+    if record is None or context["existing"].merge(record):
+        return None, result
+    return process_row(row, context)
+
+
+def reset_connections():
+    """
+    Drop any http connections inherited from the parent process.
+
+    Forked worker processes must not share open sockets with the parent,
+    this makes pywikibot open new connections when they are needed.
+    """
+    pywikibot.comms.http.session.close()
+
+
+def make_worker_pool(workers, context):
+    """
+    Create a pool of worker processes for processing rows.
+
+    The processes are forked after the mapping and data files have been
+    loaded, so they share these (read only) with the parent process
+    instead of loading their own copies. The same goes for the cached
+    lookups, which is why a new pool is made for each batch.
+
+    Each worker keeps its own copy of the existing items, the items
+    matched by its rows are merged into the parent's by
+    merge_worker_result().
+
+    :param workers: Number of worker processes.
+    :param context: The context passed to process_row().
+    """
+    worker_context.update(context)
+    fork = multiprocessing.get_context("fork")
+    return fork.Pool(workers, initializer=reset_connections)
+
+
 def get_items(connection,
               dataset,
               upload,
               short=False,
               offset=None,
               table=False,
-              list_matches=False):
+              list_matches=False,
+              batch_size=DEFAULT_BATCH,
+              resume=False,
+              seed=None,
+              workers=1,
+              prefetch_workers=utils.PREFETCH_WORKERS,
+              preview_shard=None,
+              log_json=False,
+              log_background=False,
+              batch_upload=False,
+              upload_workers=1,
+              edits_per_minute=DEFAULT_EDITS_PER_MINUTE,
+              force_upload=False,
+              since=None,
+              incremental=False):
     """
     Retrieve data from database and process it.
 
+    Unless a random sample is requested the rows are read from the
+    database in batches, so that processing can start right away.
+    If the dataset specifies an id column the table is paginated on it
+    and a checkpoint is saved after each batch, otherwise the rows are
+    streamed.
+
     :param connection: Connection used to access the database.
     :param dataset: The Database instance to work on.
     :param upload: Whether to upload the processed items.
     :param short: Optional number of randomly selected rows to process.
-    :param offset: Optional offset to retrieve rows.
+    :param offset: Optional offset to retrieve rows. Not used for random
+        samples.
     :param table: Whether to save the results as a wikitable.
     :param list_matches: Whether to save a list of matched items and their
         P31 values for copy/pasting to Wikidata.
+    :param batch_size: Number of rows to retrieve from the database at a time.
+    :param resume: Whether to continue after the last checkpoint.
+    :param seed: Optional seed for the random sample, a random one is used
+        (and printed) if not provided.
+    :param workers: Number of processes to create the Monuments in.
+        Cannot be combined with upload.
+    :param prefetch_workers: Number of simultaneous lookups of the wp pages
+        linked from each batch, 0 to look them up when they are needed.
+    :param preview_shard: Optional number of monuments per file of the
+        table, by default all of them are saved to one file.
+    :param log_json: Whether to log the uploads as JSON records.
+    :param log_background: Whether to write the upload log from a
+        separate thread.
+    :param batch_upload: Whether to upload each Monument in a single edit.
+    :param upload_workers: Number of threads to upload the Monuments in,
+        while the next ones are processed.
+    :param edits_per_minute: Maximum rate of edits of all the upload
+        threads together, None for no limit.
+    :param force_upload: Whether to also upload the Monuments whose data
+        hasn't changed since they were last uploaded live.
+    :param since: Optional time to only process the rows changed after.
+    :param incremental: Whether to only process the rows changed after
+        the last successful live upload of the dataset. After each
+        successful live upload of the whole table, or of the rows
+        changed since a time, the latest change of the table when the
+        run started is saved for the next incremental run.
+    :return: dictionary with the number of rows processed, problem
+        reports and skipped uploads, and for live uploads the number of
+        new, changed and unchanged Monuments.
     """
-    filenames = make_filenames(
-        dataset.table_name, utils.get_current_timestamp())
+    if upload and workers > 1:
+        print("Uploading cannot be combined with multiple workers.")
+        return
+    run_id = utils.get_current_timestamp()
+    filenames = make_filenames(dataset.table_name, run_id)
     if upload:
-        logger = Logger()
+        logger = Logger(json_records=log_json, background=log_background)
     if not utils.table_exists(connection, dataset.table_name):
         print("Table does not exist.")
         return
@@ -200,80 +571,204 @@ def get_items(connection,
         existing = get_wd_items_using_prop(unique_prop)
     else:
         existing = None
-    query = make_query(dataset.table_name, offset)
+    checkpoint = None
+    if resume and not dataset.id_column:
+        print("Dataset has no id column, cannot resume.")
+        return
+    # the latest change can only be saved if no changed row is left out
+    watermark = None
+    if upload == "live" and not short and offset is None:
+        watermark = make_watermark_filename(dataset.table_name)
+    if incremental and since is None:
+        since = utils.load_watermark(
+            make_watermark_filename(dataset.table_name))
+        if since is None:
+            print("NO WATERMARK FOUND, READING THE WHOLE TABLE")
+    if since is not None:
+        print("ONLY READING ROWS CHANGED AFTER {}".format(since))
+    since_params = [since] if since is not None else None
 
     print_row_count(dataset.table_name, connection)
-    database_rows = select_query(query, connection)
     if short:
-        database_rows = utils.get_random_list_sample(database_rows, short)
-        print("USING RANDOM SAMPLE OF " + str(short))
+        if seed is None:
+            seed = random.randint(0, MAX_SEED)
+        query = utils.make_sample_query(
+            dataset.table_name, short, seed, dataset.id_column, since)
+        database_rows = select_query(query, connection, since_params)
+        print("USING RANDOM SAMPLE OF {} (SEED {})".format(short, seed))
+        batches = [database_rows]
+    elif dataset.id_column:
+        checkpoint = make_checkpoint_filename(dataset.table_name)
+        start_key = None
+        if resume:
+            start_key = load_checkpoint(checkpoint)
+            if start_key is None:
+                print("NO CHECKPOINT FOUND, STARTING FROM THE BEGINNING")
+            else:
+                print("RESUMING AFTER {} = {}".format(
+                    dataset.id_column, start_key))
+                offset = None
+                # the rows before it were read by an earlier run
+                watermark = None
+        batches = select_query_keyset(
+            connection, dataset.table_name, dataset.id_column, batch_size,
+            start_key, offset, since)
+    else:
+        query = utils.make_query(dataset.table_name, offset, since)
+        batches = select_query_stream(
+            query, connection, batch_size, since_params)
+    last_change = None
+    if watermark:
+        # read before the batches are, so that the rows changed during
+        # the run are changed after it, and read again by the next run
+        last_change = get_last_change(dataset.table_name, connection)
 
     matched_item_p31s = {}
-    problem_reports = []
-    skipped_uploads = []
+    problem_reports = ReportWriter(
+        filenames['reports'], default=utils.datetime_convert)
+    skipped_uploads = LineWriter(filenames['skipped'])
+    preview = PreviewWriter(filenames['examples'], preview_shard)
 
     wikidata_site = utils.create_site_instance("wikidata", "wikidata")
+    utils.create_dir(CACHE_DIR)
+    utils.set_entity_cache(
+        EntityCache(path.join(CACHE_DIR, "entities.sqlite")))
     data_files = load_data(dataset)
-    counter = 0
-    for row in database_rows:
-        if not upload and counter % 100 == 0:
-            # visual feedback needed for preview runs
-            print(".", end="", flush=True)
-        counter += 1
-        monument = dataset.monument_class(
-            row, mapping, data_files, existing, wikidata_site)
-        problem_report = monument.get_report()
-        if not monument.upload:
-            skipped_uploads.append(monument)
-        if table:
-            raw_data = "<pre>" + str(row) + "</pre>\n"
-            monument_table = monument.print_wd_to_table()
-            utils.append_line_to_file(raw_data, filenames['examples'])
-            utils.append_line_to_file(monument_table, filenames['examples'])
-        if upload:
-            live = True if upload == "live" else False
-            uploader = Uploader(
-                monument,
+    journal = None
+    if upload == "live":
+        utils.create_dir(CHECKPOINT_DIR)
+        journal = UploadJournal(
+            path.join(CHECKPOINT_DIR, "upload_journal.sqlite"),
+            dataset.table_name, run_id)
+    if upload:
+        def make_uploader():
+            return Uploader(
                 repo=wikidata_site,
                 log=logger,
                 tablename=dataset.country,
-                live=live)
-            if "Q" in problem_report and problem_report["Q"] == "":
-                """
-                If the Monument didn't have an associated Qid,
-                this means the Uploader has now created a new Item
-                for it -- insert that id into the problem report.
-                """
-                problem_report["Q"] = uploader.wd_item_q
-
-            uploader.upload()
-            print("--------------------------------------------------")
-        if list_matches:
-            match_info = monument.get_matched_item_p31s()
-            if match_info:
-                for p31 in match_info[0]:
-                    if p31 not in matched_item_p31s:
-                        matched_item_p31s[p31] = []
-                    matched_item_p31s[p31].append(
-                        (match_info[1], match_info[2]))
-        if problem_report:  # dictionary is not empty
-            problem_reports.append(problem_report)
-            utils.json_to_file(
-                filenames['reports'], problem_reports, silent=True)
-
-    if not upload:
+                live=upload == "live",
+                batch=batch_upload,
+                journal=journal)
+
+        uploads = UploadScheduler(
+            make_uploader, TokenBucket(edits_per_minute), upload_workers)
+    context = {
+        "dataset": dataset,
+        "mapping": mapping,
+        "data_files": data_files,
+        "existing": existing,
+        "wikidata_site": wikidata_site,
+        "table": table,
+        "list_matches": list_matches}
+    pool = None
+    counter = 0
+    upload_states = {NEW: 0, CHANGED: 0, UNCHANGED: 0}
+    try:
+        for batch in batches:
+            if prefetch_workers:
+                prefetch_links(dataset, batch, prefetch_workers)
+                prefetch_candidate_items(
+                    dataset, batch, wikidata_site, prefetch_workers)
+                dataset.monument_class.prefetch_online_data(
+                    batch, prefetch_workers)
+            if workers > 1:
+                # forked after the prefetch, to share the lookups made
+                pool = make_worker_pool(workers, context)
+                chunksize = max(1, len(batch) // (workers * 4))
+                results = (
+                    merge_worker_result(row, result, context)
+                    for row, result in zip(batch, pool.imap(
+                        process_row_in_worker, batch, chunksize)))
+            else:
+                results = (process_row(row, context) for row in batch)
+            for monument, result in results:
+                if not upload and counter % 100 == 0:
+                    # visual feedback needed for preview runs
+                    print(".", end="", flush=True)
+                counter += 1
+                problem_report = result["report"]
+                if result["skipped"]:
+                    skipped_uploads.write_line(result["skipped"])
+                if table:
+                    preview.write_monument(*result["table"])
+                if list_matches:
+                    match_info = result["matches"]
+                    if match_info:
+                        for p31 in match_info[0]:
+                            if p31 not in matched_item_p31s:
+                                matched_item_p31s[p31] = []
+                            matched_item_p31s[p31].append(
+                                (match_info[1], match_info[2]))
+                if upload:
+                    # the report is written once the item is uploaded
+                    finish = functools.partial(
+                        write_uploaded_report, problem_reports,
+                        problem_report)
+                    upload_state = None
+                    # a monument without an id can't be told apart from
+                    # others, so it isn't journaled
+                    if (journal and monument.upload and
+                            monument.monuments_all_id):
+                        upload_state, uploaded_q = journal.start_upload(
+                            monument.monuments_all_id, monument.wd_item,
+                            force_upload)
+                        upload_states[upload_state] += 1
+                    if upload_state == UNCHANGED and not force_upload:
+                        uploads.skip(uploaded_q, finish)
+                    else:
+                        uploads.submit(monument, finish)
+                elif problem_report:  # dictionary is not empty
+                    problem_reports.write(problem_report)
+            if pool:
+                pool.close()
+                pool.join()
+                pool = None
+            if upload:
+                # only save a checkpoint for rows that are done
+                uploads.join()
+            if checkpoint:
+                save_checkpoint(
+                    checkpoint, batch[-1][dataset.id_column], counter)
+    finally:
+        if pool:
+            pool.terminate()
+        if upload:
+            uploads.close()
+        # keep the output made so far, even if the run failed
+        problem_reports.close()
+        skipped_uploads.close()
+        preview.close()
+        if upload:
+            logger.close()
+        if journal:
+            journal.close()
+
+    if checkpoint and path.isfile(checkpoint):
+        # the whole table was processed, nothing left to resume
+        os.remove(checkpoint)
+    if watermark and last_change is not None:
+        utils.save_watermark(watermark, last_change)
+        print("SAVED LATEST CHANGE {}".format(last_change))
+
+    if upload:
+        uploads.report()
+        if journal:
+            print("{new} NEW, {changed} CHANGED AND {unchanged} UNCHANGED "
+                  "MONUMENTS".format(**upload_states))
+            if not force_upload and upload_states[UNCHANGED]:
+                print("SKIPPED {} UNCHANGED MONUMENTS".format(
+                    upload_states[UNCHANGED]))
+    else:
         print("\n")  # linebreak needed in case of visual feedback dots
-    if problem_reports:
+    if problem_reports.count:
+        problem_reports.finalize()
         print("SAVED PROBLEM REPORTS TO {}".format(filenames['reports']))
-    if skipped_uploads:
-        skipped_items_output = "\n".join(
-            format_skipped_items(skipped_uploads))
-        utils.save_to_file(
-            filenames['skipped'], skipped_items_output, silent=True)
+    if skipped_uploads.count:
         print("SAVED {0} SKIPPED UPLOADS TO {1}".format(
-            len(skipped_uploads), filenames['skipped']))
+            skipped_uploads.count, filenames['skipped']))
     if table:
-        print("SAVED TEST RESULTS TO {}".format(filenames['examples']))
+        for preview_filename in preview.filenames:
+            print("SAVED TEST RESULTS TO {}".format(preview_filename))
     if list_matches:
         matched_items_output = (
             '{| class="wikitable sortable"\n'
@@ -283,14 +778,41 @@ def get_items(connection,
         matched_items_output += "\n|}"
         utils.save_to_file(filenames['matches'], matched_items_output)
 
+    stats = {
+        "rows": counter,
+        "reports": problem_reports.count,
+        "skipped": skipped_uploads.count}
+    if journal:
+        stats.update(upload_states)
+    print("PROCESSED {rows} ROWS: {reports} PROBLEM REPORTS, "
+          "{skipped} SKIPPED UPLOADS".format(**stats))
+    return stats
 
-def format_skipped_items(skipped_items):
-    rows = []
-    for monument in skipped_items:
-        wd_item = monument.wd_item.get("wd-item")
-        wlm_id = monument.monuments_all_id
-        rows.append("{0} | {1}".format(wd_item, wlm_id))
-    return rows
+
+def write_uploaded_report(problem_reports, problem_report, wd_item_q):
+    """
+    Write the problem report of a Monument after uploading it.
+
+    :param problem_reports: the ReportWriter of the run
+    :param problem_report: the problem report of the Monument
+    :param wd_item_q: the Qid of the uploaded item
+    """
+    if "Q" in problem_report and problem_report["Q"] == "":
+        """
+        If the Monument didn't have an associated Qid,
+        this means the Uploader has now created a new Item
+        for it -- insert that id into the problem report.
+        """
+        problem_report["Q"] = wd_item_q
+    if problem_report:  # dictionary is not empty
+        problem_reports.write(problem_report)
+    print("-----------------------------------------------")
+
+
+def format_skipped_item(monument):
+    wd_item = monument.wd_item.get("wd-item")
+    wlm_id = monument.monuments_all_id
+    return "{0} | {1}".format(wd_item, wlm_id)
 
 
 def format_matched_p31s_rows(matched_item_p31s):
@@ -320,13 +842,27 @@ def main(arguments, dataset):
         arguments["user"] = credentials["user"]
         arguments["password"] = credentials["password"]
     connection = create_connection(arguments)
-    short = arguments["short"]
-    offset = arguments["offset"]
-    upload = arguments["upload"]
-    table = arguments["table"]
-    list_matches = arguments["list_matches"]
-
-    get_items(connection, dataset, upload, short, offset, table, list_matches)
+    get_items(connection,
+              dataset,
+              upload=arguments["upload"],
+              short=arguments["short"],
+              offset=arguments["offset"],
+              table=arguments["table"],
+              list_matches=arguments["list_matches"],
+              batch_size=arguments["batch_size"],
+              resume=arguments["resume"],
+              seed=arguments["seed"],
+              workers=arguments["workers"],
+              prefetch_workers=arguments["prefetch_workers"],
+              preview_shard=arguments["preview_shard"],
+              log_json=arguments["log_json"],
+              log_background=arguments["log_background"],
+              batch_upload=arguments["batch_upload"],
+              upload_workers=arguments["upload_workers"],
+              edits_per_minute=arguments["edits_per_minute"],
+              force_upload=arguments["force_upload"],
+              since=arguments["since"],
+              incremental=arguments["incremental"])
 
 
 def get_db_credentials():
@@ -343,6 +879,15 @@ def get_db_credentials():
     return credentials
 
 
+def positive_int(value):
+    """Convert a command line argument to an integer of at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            "{} is not a positive integer".format(value))
+    return number
+
+
 def on_forge():
     """Check if running in the Toolforge environment."""
     return path.isfile(path.expanduser("~") + "/replica.my.cnf")
@@ -364,8 +909,33 @@ def handle_args(*args):
             --upload sandbox Upload to the Wikidata sandbox item.
             --upload live Live upload to real Wikidata items.
         --short <int> Only fetch a random sample of <int> items.
+        --seed <int> Seed for the random sample, to get the same sample
+            as a previous run.
         --table Save results of the processing to file as a wikitable.
+        --preview_shard <int> Split the wikitable into files of <int>
+            monuments each, at least 1.
         --list_matches Save a list of all matching items to a file as wikitext.
+        --batch_size <int> Number of rows to retrieve from the database at a
+            time, at least 1 (defaults to 500).
+        --resume Continue after the last row processed by an interrupted run.
+            Only for datasets with an id column.
+        --workers <int> Number of processes to process the rows in,
+            for preview runs (defaults to 1).
+        --prefetch_workers <int> Number of simultaneous lookups of linked
+            wp pages ahead of processing (defaults to 8, 0 to disable).
+        --log_json Log the uploads as JSON records, one per line.
+        --log_background Write the upload log from a separate thread.
+        --batch_upload Upload all the changes to an item in a single edit.
+        --upload_workers <int> Number of threads to upload in, at least 1
+            (defaults to 1).
+        --edits_per_minute <int> Maximum number of edits per minute of all
+            the upload threads (defaults to 60, 0 for no limit).
+        --force_upload Upload all the monuments, also the ones that haven't
+            changed since they were last uploaded live.
+        --since <time> Only process the rows changed after <time>,
+            e.g. "2026-10-01 00:00:00".
+        --incremental Only process the rows changed after the latest change
+            of the last successful live upload.
     """
     parser = argparse.ArgumentParser()
     if not on_forge():
@@ -379,12 +949,45 @@ def handle_args(*args):
                         nargs='?',
                         type=int,
                         action='store',)
+    parser.add_argument("--seed",
+                        type=int,
+                        action='store',)
     parser.add_argument("--offset",
                         nargs='?',
                         type=int,
                         action='store',)
     parser.add_argument("--table", action='store_true')
+    parser.add_argument("--preview_shard",
+                        type=positive_int,
+                        action='store',)
     parser.add_argument("--list_matches", action='store_true')
+    parser.add_argument("--batch_size",
+                        default=DEFAULT_BATCH,
+                        type=positive_int,
+                        action='store',)
+    parser.add_argument("--resume", action='store_true')
+    parser.add_argument("--workers",
+                        default=1,
+                        type=int,
+                        action='store',)
+    parser.add_argument("--prefetch_workers",
+                        default=utils.PREFETCH_WORKERS,
+                        type=int,
+                        action='store',)
+    parser.add_argument("--log_json", action='store_true')
+    parser.add_argument("--log_background", action='store_true')
+    parser.add_argument("--batch_upload", action='store_true')
+    parser.add_argument("--upload_workers",
+                        default=1,
+                        type=positive_int,
+                        action='store',)
+    parser.add_argument("--edits_per_minute",
+                        default=DEFAULT_EDITS_PER_MINUTE,
+                        type=int,
+                        action='store',)
+    parser.add_argument("--force_upload", action='store_true')
+    parser.add_argument("--since", action='store')
+    parser.add_argument("--incremental", action='store_true')
 
     # first parse args with pywikibot, send remaining args to local handler
     return parser.parse_args(pywikibot.handle_args(args))
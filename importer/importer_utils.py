@@ -7,14 +7,26 @@ import os
 import mwparserfromhell as wparser
 import string
 import pywikibot
+import pywikibot.data.api
 import datetime
 import requests
 import pymysql
-import random
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote
 from wikidataStuff.WikidataStuff import WikidataStuff as wds
 
+PREFETCH_WORKERS = 8
+API_TITLE_LIMIT = 50
+CHANGED_COLUMN = "changed"
+
+# datatypes whose values are kept as plain strings by pywikibot
+STRING_DATATYPES = ("string", "external-id", "url", "math",
+                    "musical-notation")
+
 site_cache = {}
+wikipedia_cache = {}
+entity_cache = None
+blacklist_verdicts = {}
 
 
 def remove_empty_dicts_from_list(list_of_dicts):
@@ -74,6 +86,139 @@ def table_exists(connection, tablename):
         return False
 
 
+def make_changed_condition(since):
+    """
+    Generate the condition selecting the rows changed after a time.
+
+    The time is passed as a parameter to the query.
+
+    :param since: Optional time, None to select all rows.
+    :return: the condition, or an empty list if all rows are selected
+    """
+    if since is None:
+        return []
+    return ["`{}` > %s".format(CHANGED_COLUMN)]
+
+
+def make_query(specific_table, offset, since=None):
+    """
+    Generate a query to retrieve data from database.
+
+    :param specific_table: Name of table to retrieve data from.
+    :param offset: Optional offset to start from.
+    :param since: Optional time to only retrieve the rows changed after,
+        passed as a parameter to the query.
+    """
+    query = 'select DISTINCT * from `{}`'.format(specific_table)
+    conditions = make_changed_condition(since)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if isinstance(offset, int):
+        unlimited = "18446744073709551615"
+        # workaround for MySQL requiring a limit when using offset
+        query += " LIMIT {}, {};".format(str(offset), unlimited)
+    return query
+
+
+def make_keyset_query(specific_table, id_column, last_key, limit,
+                      offset=None, since=None):
+    """
+    Generate a query to retrieve the next chunk of rows from the database.
+
+    Rows are ordered by id_column and only rows after last_key are
+    retrieved, so MySQL can seek directly to the start of the chunk
+    instead of scanning all the previous rows. The key is passed
+    as a parameter to the query.
+
+    :param specific_table: Name of table to retrieve data from.
+    :param id_column: Unique column to order and page by.
+    :param last_key: Value of id_column of the last processed row,
+        None to start from the beginning of the table.
+    :param limit: Maximum number of rows in the chunk.
+    :param offset: Optional number of rows to skip, only used for
+        the first chunk.
+    :param since: Optional time to only retrieve the rows changed after,
+        passed as a parameter to the query after the key.
+    """
+    query = 'select DISTINCT * from `{}`'.format(specific_table)
+    conditions = []
+    if last_key is not None:
+        conditions.append("`{}` > %s".format(id_column))
+    conditions.extend(make_changed_condition(since))
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY `{}`".format(id_column)
+    if isinstance(offset, int):
+        query += " LIMIT {}, {}".format(offset, limit)
+    else:
+        query += " LIMIT {}".format(limit)
+    return query
+
+
+def make_sample_query(specific_table, amount, seed, id_column=None,
+                      since=None):
+    """
+    Generate a query to retrieve a random sample of rows from database.
+
+    The sampling is done by the database so that only the sampled rows
+    are transferred. The same seed gives the same sample. If an id column
+    is given the rows are ordered by a seeded hash of it, which does not
+    depend on the order in which MySQL happens to scan the table.
+
+    :param specific_table: Name of table to retrieve data from.
+    :param amount: Number of rows to retrieve.
+    :param seed: Integer used to seed the random ordering.
+    :param id_column: Optional unique column of the table.
+    :param since: Optional time to only sample the rows changed after,
+        passed as a parameter to the query.
+    """
+    if id_column:
+        order = "MD5(CONCAT({}, '-', `{}`))".format(int(seed), id_column)
+    else:
+        order = "RAND({})".format(int(seed))
+    conditions = make_changed_condition(since)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    return ('select * from (select DISTINCT * from `{}`{}) as distinct_rows '
+            'ORDER BY {} LIMIT {}').format(
+                specific_table, where, order, int(amount))
+
+
+def make_last_change_query(specific_table):
+    """Generate a query to retrieve the latest change of a table."""
+    return "SELECT MAX(`{}`) AS last_change FROM `{}`".format(
+        CHANGED_COLUMN, specific_table)
+
+
+def load_watermark(filename):
+    """
+    Get the latest change imported from a watermark file.
+
+    :param filename: path to the watermark file
+    :return: the value of the changed column, or None if there is no
+        watermark
+    """
+    if os.path.isfile(filename):
+        return load_json(filename)["changed"]
+
+
+def save_watermark(filename, changed):
+    """
+    Save the latest change of a table, once all its rows are imported.
+
+    The file is replaced atomically, as checkpoints are.
+
+    :param filename: path to the watermark file
+    :param changed: the latest value of the changed column when the rows
+        were read
+    """
+    tmp_filename = filename + ".tmp"
+    json_to_file(tmp_filename,
+                 {"changed": str(changed),
+                  "timestamp": get_current_timestamp()},
+                 silent=True)
+    os.replace(tmp_filename, filename)
+
+
 def load_json(filename):
     try:
         with open(filename, encoding="utf-8") as f:
@@ -181,45 +326,333 @@ def count_wikilinks(text):
     return len(get_wikilinks(text))
 
 
-def q_from_wikipedia(language, page_title):
+def clean_page_title(page_title):
     """
-    Get the ID of the WD item linked to a wp page.
+    Get a usable wp page title from a title or a wikilink.
 
-    If the page exists, has no item and is in the article
-    namespace, create an item for it.
+    :return: the title, or None if there is no title
     """
-    # various cleanup
     if page_title.startswith("[[") and page_title.endswith("]]"):
         internal_links = get_wikilinks(page_title)
         if not internal_links:
             return
         page_title = internal_links[0].title
 
-    if isinstance(page_title, str):
-        # get_wikilinks()[0].title does not return a str
-        page_title = page_title.replace('\n', ' ')
+    # get_wikilinks()[0].title does not return a str
+    page_title = str(page_title).replace('\n', ' ').strip()
 
-    if not page_title:
-        return
+    if page_title:
+        return page_title
+
+
+def resolve_wikipedia_page(language, page_title):
+    """
+    Get the ID of the WD item linked to a wp page, without creating any.
 
-    wp_site = pywikibot.Site(language, "wikipedia")
+    Redirects are followed, disambiguation pages are not matched.
+
+    :return: a tuple of the ID of the item (or None) and, if the page is
+        an article without an item, the page to create an item for.
+    """
+    wp_site = create_site_instance(language, "wikipedia")
     page = pywikibot.Page(wp_site, page_title)
+    if not page.exists():
+        return None, None
+    if page.isRedirectPage():
+        page = page.getRedirectTarget()
+    if page.isDisambig():
+        return None, None
+    try:
+        item = pywikibot.ItemPage.fromPage(page)
+    except pywikibot.NoPage:
+        if page.namespace() != 0:  # main namespace
+            return None, None
+        return None, page
+    return item.getID(), None
+
+
+def create_item_for_page(language, page):
+    """Create a WD item for a wp page and return its ID."""
     summary = "Creating item for {} on {}wp."
-    summary = summary.format(page_title, language)
+    summary = summary.format(page.title(), language)
     wd_repo = create_site_instance("wikidata", "wikidata")
     wdstuff = wds(wd_repo, edit_summary=summary, no_wdss=True)
-    if page.exists():
-        if page.isRedirectPage():
-            page = page.getRedirectTarget()
-        if page.isDisambig():
+    item = wdstuff.make_new_item_from_page(page, summary)
+    return item.getID()
+
+
+def q_from_wikipedia(language, page_title):
+    """
+    Get the ID of the WD item linked to a wp page.
+
+    If the page exists, has no item and is in the article
+    namespace, create an item for it.
+
+    The results are cached, so each page is only looked up once.
+    """
+    page_title = clean_page_title(page_title)
+    if not page_title:
+        return
+
+    cache_key = (language, page_title)
+    if cache_key not in wikipedia_cache:
+        item_q, unlinked_page = resolve_wikipedia_page(language, page_title)
+        if unlinked_page:
+            item_q = create_item_for_page(language, unlinked_page)
+        wikipedia_cache[cache_key] = item_q
+    return wikipedia_cache[cache_key]
+
+
+def parse_pageprops_query(page_titles, query):
+    """
+    Get the linked WD items from the result of a pageprops query.
+
+    Redirects are followed, disambiguation pages are not matched.
+
+    :param page_titles: titles of the pages that were queried
+    :param query: the "query" part of the API response
+    :return: a dict with, for each title, a tuple of the ID of the linked
+        item (or None) and, if the page is an article without an item,
+        the title of the page to create an item for. Titles that the query
+        could not resolve, e.g. invalid ones or interwiki links, are left
+        out.
+    """
+    results = {}
+    normalized = {x["from"]: x["to"] for x in query.get("normalized", [])}
+    redirects = {x["from"]: x["to"] for x in query.get("redirects", [])}
+    pages = query.get("pages", [])
+    if isinstance(pages, dict):  # formatversion=1
+        pages = pages.values()
+    pages = {page["title"]: page for page in pages}
+    for page_title in page_titles:
+        title = normalized.get(page_title, page_title)
+        title = redirects.get(title, title)
+        page = pages.get(title)
+        if page is None or "invalid" in page:
+            continue
+        pageprops = page.get("pageprops", {})
+        if "missing" in page or "disambiguation" in pageprops:
+            results[page_title] = (None, None)
+        elif "wikibase_item" in pageprops:
+            results[page_title] = (pageprops["wikibase_item"], None)
+        elif page["ns"] != 0:  # main namespace
+            results[page_title] = (None, None)
+        else:
+            results[page_title] = (None, title)
+    return results
+
+
+def resolve_wikipedia_pages(language, page_titles):
+    """
+    Get the IDs of the WD items linked to many wp pages, without creating any.
+
+    Bulk version of resolve_wikipedia_page(), the pages are looked up in
+    queries of up to API_TITLE_LIMIT titles each.
+
+    :param language: language version of wikipedia
+    :param page_titles: cleaned titles of the pages
+    :return: see parse_pageprops_query()
+    """
+    wp_site = create_site_instance(language, "wikipedia")
+    page_titles = list(page_titles)
+    results = {}
+    for i in range(0, len(page_titles), API_TITLE_LIMIT):
+        chunk = page_titles[i:i + API_TITLE_LIMIT]
+        request = pywikibot.data.api.Request(site=wp_site, parameters={
+            "action": "query",
+            "titles": "|".join(chunk),
+            "redirects": 1,
+            "prop": "pageprops",
+            "ppprop": "wikibase_item|disambiguation",
+            "formatversion": 2})
+        query = request.submit().get("query", {})
+        results.update(parse_pageprops_query(chunk, query))
+    return results
+
+
+def q_from_wikipedia_bulk(language, page_titles, create=True):
+    """
+    Get the IDs of the WD items linked to many wp pages.
+
+    Bulk version of q_from_wikipedia(), sharing its cache. Pages are
+    looked up in a few multi-title queries instead of one by one.
+
+    :param language: language version of wikipedia
+    :param page_titles: titles or wikilinks of the pages
+    :param create: whether to create items for articles without one, as
+        q_from_wikipedia() does. If not, such pages are left out of the
+        results and the cache, as are pages the bulk query could not
+        resolve.
+    :return: dict of cleaned title to item ID (or None)
+    """
+    titles = set()
+    for page_title in page_titles:
+        page_title = clean_page_title(page_title)
+        if page_title:
+            titles.add(page_title)
+    pending = [title for title in titles
+               if (language, title) not in wikipedia_cache]
+
+    resolved = resolve_wikipedia_pages(language, pending)
+    for page_title in pending:
+        cache_key = (language, page_title)
+        if page_title not in resolved:
+            if create:
+                # let the single page lookup handle (or raise on) it
+                q_from_wikipedia(language, page_title)
+            continue
+        item_q, unlinked_title = resolved[page_title]
+        if unlinked_title:
+            if not create:
+                continue
+            wp_site = create_site_instance(language, "wikipedia")
+            item_q = create_item_for_page(
+                language, pywikibot.Page(wp_site, unlinked_title))
+        wikipedia_cache[cache_key] = item_q
+
+    return {title: wikipedia_cache[(language, title)] for title in titles
+            if (language, title) in wikipedia_cache}
+
+
+def prefetch_wikipedia_items(language, page_titles,
+                             workers=PREFETCH_WORKERS):
+    """
+    Look up the WD items of many wp pages concurrently.
+
+    The pages are split into chunks which are looked up with
+    q_from_wikipedia_bulk(), so the results end up in the cache used by
+    q_from_wikipedia(). No items are created here, articles without an
+    item are left out of the cache so that q_from_wikipedia() creates the
+    item if and when it is actually needed.
+
+    :param language: language version of wikipedia
+    :param page_titles: titles or wikilinks of the pages
+    :param workers: maximum number of simultaneous lookups
+    """
+    def resolve(chunk):
+        try:
+            q_from_wikipedia_bulk(language, chunk, create=False)
+        except pywikibot.exceptions.Error:
+            # leave these for q_from_wikipedia()
             return
+
+    pending = set()
+    for page_title in page_titles:
+        page_title = clean_page_title(page_title)
+        if page_title and (language, page_title) not in wikipedia_cache:
+            pending.add(page_title)
+    if not pending:
+        return
+    pending = sorted(pending)
+    chunks = [pending[i:i + API_TITLE_LIMIT]
+              for i in range(0, len(pending), API_TITLE_LIMIT)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(resolve, chunks))
+
+
+def get_cached_q_from_wikipedia(language, page_title):
+    """
+    Get the ID of the WD item of a wp page if it has already been looked up.
+
+    :return: the item ID, or None if the page has no item or has not been
+        looked up yet
+    """
+    page_title = clean_page_title(page_title)
+    return wikipedia_cache.get((language, page_title))
+
+
+def parse_entity_claims(claims):
+    """
+    Simplify the claims of an entity returned by wbgetentities.
+
+    Gives the same result as get_item_claims() does for an ItemPage.
+
+    :param claims: the "claims" of the entity in the API response
+    :return: dict of property ID to the list of values, with items given
+        by their IDs. Properties with other values than items and strings
+        are given as None.
+    """
+    results = {}
+    for property_id, prop_claims in claims.items():
+        values = []
+        for claim in prop_claims:
+            snak = claim["mainsnak"]
+            if snak["snaktype"] != "value":
+                values.append(None)
+            elif snak.get("datatype") == "wikibase-item":
+                values.append(snak["datavalue"]["value"]["id"])
+            elif snak.get("datatype") in STRING_DATATYPES:
+                values.append(snak["datavalue"]["value"])
+            else:
+                values = None
+                break
+        results[property_id] = values
+    return results
+
+
+def fetch_entities(q_numbers, site):
+    """
+    Download the claims of many items and store them in the entity cache.
+
+    The items are loaded in wbgetentities calls of up to API_TITLE_LIMIT
+    items each. Redirected items are left for the single item lookup.
+
+    :param q_numbers: IDs of the items
+    :param site: the Wikibase site
+    """
+    q_numbers = list(q_numbers)
+    for i in range(0, len(q_numbers), API_TITLE_LIMIT):
+        chunk = q_numbers[i:i + API_TITLE_LIMIT]
+        request = pywikibot.data.api.Request(site=site, parameters={
+            "action": "wbgetentities",
+            "ids": "|".join(chunk),
+            "props": "claims|info"})
+        entities = request.submit().get("entities", {})
+        for q_number, entity in entities.items():
+            if q_number not in chunk or entity.get("id", q_number) != q_number:
+                continue
+            if "missing" in entity:
+                entity_cache.put(q_number, None, {})
+            else:
+                entity_cache.put(q_number,
+                                 entity.get("lastrevid"),
+                                 parse_entity_claims(entity.get("claims", {})))
+
+
+def prefetch_entities(q_numbers, site, workers=PREFETCH_WORKERS):
+    """
+    Load the claims of many items into the entity cache concurrently.
+
+    Items that are already cached and not expired are skipped. This does
+    nothing if no entity cache is set.
+
+    :param q_numbers: IDs of the items
+    :param site: the Wikibase site
+    :param workers: maximum number of simultaneous downloads
+    """
+    def fetch(chunk):
         try:
-            item = pywikibot.ItemPage.fromPage(page)
-        except pywikibot.NoPage:
-            if page.namespace() != 0:  # main namespace
-                return
-            item = wdstuff.make_new_item_from_page(page, summary)
-        return item.getID()
+            fetch_entities(chunk, site)
+        except pywikibot.exceptions.Error:
+            # leave these for get_cached_claims()
+            return
+
+    if entity_cache is None:
+        return
+    pending = set()
+    for q_number in q_numbers:
+        if not string_is_q_item(q_number) or q_number in pending:
+            continue
+        entry = entity_cache.get(q_number)
+        if entry is None or entity_cache.is_expired(entry):
+            pending.add(q_number)
+    if not pending:
+        return
+    pending = sorted(pending)
+    chunks = [pending[i:i + API_TITLE_LIMIT]
+              for i in range(0, len(pending), API_TITLE_LIMIT)]
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        list(executor.map(fetch, chunks))
 
 
 def q_from_first_wikilink(language, text):
@@ -230,6 +663,25 @@ def q_from_first_wikilink(language, text):
         return
 
 
+def get_items_by_label(value, dict_name):
+    """
+    Return the items in a lookup table for the label matching a value.
+
+    Uses the index of a LookupMappings, otherwise the labels are searched.
+
+    @param value: the value to match, in lowercase
+    @param dict_name: the mappings of the lookup table to look in
+    @return: the items of the first label that lowercases to the value,
+        or None if there is no such label
+    """
+    if hasattr(dict_name, "get_items"):  # a LookupMappings
+        return dict_name.get_items(value)
+    for label in dict_name:
+        if label.lower() == value:
+            return dict_name[label]["items"]
+    return None
+
+
 def get_matching_items_from_dict(value, dict_name):
     """
     Return all items in a dict for which the label matches the provided value.
@@ -237,12 +689,11 @@ def get_matching_items_from_dict(value, dict_name):
     @param value: the value to match
     @param dict_name: the dict to look in
     """
-    matches = [dict_name[x]["items"]
-               for x in dict_name if x.lower() == value]
-    if len(matches) == 0:
+    matches = get_items_by_label(value, dict_name)
+    if matches is None:
         return []
     else:
-        return matches[0]
+        return matches
 
 
 def get_item_from_dict_by_key(dict_name,
@@ -263,7 +714,10 @@ def get_item_from_dict_by_key(dict_name,
     @param return_content_of: the field whose content to return
     """
     results = []
-    matches = [x for x in dict_name if x[search_in] == search_term]
+    if hasattr(dict_name, "lookup"):  # an IndexedTable
+        matches = dict_name.lookup(search_in, search_term)
+    else:
+        matches = [x for x in dict_name if x[search_in] == search_term]
     if len(matches) == 0:
         return []
     else:
@@ -623,11 +1077,80 @@ def get_current_timestamp():
     return datetime.datetime.now().strftime('%Y-%m-%d_%H:%M:%S')
 
 
-def get_random_list_sample(some_list, amount):
-    return random.sample(some_list, amount)
+def set_entity_cache(cache):
+    """
+    Set the persistent cache used when looking up claims of items.
+
+    :param cache: an EntityCache, or None to not use any cache
+    """
+    global entity_cache
+    entity_cache = cache
+
+
+def get_latest_revision(q_number, site):
+    """Get the ID of the latest revision of an item, without loading it."""
+    request = pywikibot.data.api.Request(site=site, parameters={
+        "action": "query",
+        "prop": "info",
+        "titles": q_number,
+        "formatversion": 2})
+    pages = request.submit()["query"]["pages"]
+    if isinstance(pages, dict):  # formatversion=1
+        pages = list(pages.values())
+    return pages[0].get("lastrevid")
+
+
+def get_item_claims(q_number, site):
+    """
+    Load an item and get its claims in a simplified form.
+
+    :return: a tuple of the ID of the latest revision of the item (None if
+        it doesn't exist) and a dict of property ID to the list of values,
+        with items given by their IDs. Properties with other values than
+        items and strings are given as None.
+    """
+    item = pywikibot.ItemPage(site, q_number)
+    if not item.exists():
+        return None, {}
+    claims = {}
+    for property_id, prop_claims in item.claims.items():
+        values = []
+        for claim in prop_claims:
+            target = claim.getTarget()
+            if isinstance(target, pywikibot.ItemPage):
+                target = target.getID()
+            elif target is not None and not isinstance(target, str):
+                values = None
+                break
+            values.append(target)
+        claims[property_id] = values
+    return item.latest_revision_id, claims
+
+
+def get_cached_claims(q_number, site):
+    """
+    Get the simplified claims of an item through the entity cache.
+
+    Expired entries are only downloaded again if the item has been edited
+    since they were cached.
+    """
+    entry = entity_cache.get(q_number)
+    if entry is not None:
+        if not entity_cache.is_expired(entry):
+            return entry["claims"]
+        if entry["revision"] == get_latest_revision(q_number, site):
+            entity_cache.touch(q_number)
+            return entry["claims"]
+    revision, claims = get_item_claims(q_number, site)
+    entity_cache.put(q_number, revision, claims)
+    return claims
 
 
 def get_value_of_property(q_number, property_id, site):
+    if entity_cache is not None and string_is_q_item(q_number):
+        values = get_cached_claims(q_number, site).get(property_id, [])
+        if values is not None:
+            return list(values)
     results = []
     item = pywikibot.ItemPage(site, q_number)
     if item.exists() and item.claims.get(property_id):
@@ -659,13 +1182,24 @@ def is_whitelisted_P31(q_number, site, allowed_values):
 
 
 def is_blacklisted_P31(q_number, site, dissalowed_values):
+    # The verdicts are remembered, so that an item matched by a Monument
+    # isn't checked again when it's uploaded
+    dissalowed_values = frozenset(dissalowed_values)
+    verdict_key = (q_number, dissalowed_values)
+    if verdict_key not in blacklist_verdicts:
+        blacklist_verdicts[verdict_key] = check_blacklisted_P31(
+            q_number, site, dissalowed_values)
+    return blacklist_verdicts[verdict_key]
+
+
+def check_blacklisted_P31(q_number, site, dissalowed_values):
     # Also blacklist any items which contains a P279 (sub-class) statement
     # as these by definition cannot be unique instances
     if len(get_value_of_property(q_number, "P279", site)) > 0:
         return True
 
     item_P31 = get_P31(q_number, site)
-    if len(set(dissalowed_values).intersection(set(item_P31))) > 0:
+    if len(dissalowed_values.intersection(item_P31)) > 0:
         # this means one of this item's P31's is in the
         # disallowed list
         return True
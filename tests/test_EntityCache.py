@@ -0,0 +1,50 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import os
+import shutil
+import tempfile
+import unittest
+from importer.EntityCache import EntityCache
+
+
+class TestEntityCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "entities.sqlite")
+        self.cache = EntityCache(self.filename)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get("Q1"))
+
+    def test_put_get(self):
+        claims = {"P31": ["Q5"], "P625": None}
+        self.cache.put("Q1", 123, claims)
+        entry = self.cache.get("Q1")
+        self.assertEqual(entry["revision"], 123)
+        self.assertEqual(entry["claims"], claims)
+        self.assertFalse(self.cache.is_expired(entry))
+
+    def test_put_replaces(self):
+        self.cache.put("Q1", 1, {"P31": ["Q5"]})
+        self.cache.put("Q1", 2, {"P31": ["Q6"]})
+        self.assertEqual(self.cache.get("Q1")["claims"], {"P31": ["Q6"]})
+
+    def test_expired_and_touch(self):
+        self.cache.ttl = -1
+        self.cache.put("Q1", 1, {})
+        entry = self.cache.get("Q1")
+        self.assertTrue(self.cache.is_expired(entry))
+        self.cache.touch("Q1")
+        self.assertGreater(self.cache.get("Q1")["fetched"], entry["fetched"])
+
+    def test_persistent(self):
+        self.cache.put("Q1", 1, {"P17": ["Q34"]})
+        self.cache.close()
+        other = EntityCache(self.filename)
+        self.assertEqual(other.get("Q1")["claims"], {"P17": ["Q34"]})
+        other.close()
@@ -0,0 +1,164 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import unittest
+from importer.EntityDiff import EntityDiff
+
+
+class FakeClaim(object):
+    """Stands in for a pywikibot.Claim with a plain value."""
+
+    def __init__(self, prop, target, qualifiers=None, sources=None):
+        self.prop = prop
+        self.target = target
+        self.qualifiers = qualifiers or {}
+        self.sources = sources or []
+
+    def getID(self):
+        return self.prop
+
+    def getTarget(self):
+        return self.target
+
+    def target_equals(self, value):
+        return self.target == value
+
+    def addQualifier(self, qualifier):
+        self.qualifiers.setdefault(qualifier.prop, []).append(qualifier)
+
+    def addSources(self, claims):
+        source = {}
+        for claim in claims:
+            source.setdefault(claim.prop, []).append(claim)
+        self.sources.append(source)
+
+    def toJSON(self):
+        return {
+            "property": self.prop,
+            "value": self.target,
+            "qualifiers": {prop: [x.target for x in quals]
+                           for prop, quals in self.qualifiers.items()},
+            "references": [{prop: [x.target for x in claims]
+                            for prop, claims in source.items()}
+                           for source in self.sources]}
+
+
+class FakeItem(object):
+
+    def __init__(self, labels=None, aliases=None, descriptions=None,
+                 claims=None):
+        self.labels = labels or {}
+        self.aliases = aliases or {}
+        self.descriptions = descriptions or {}
+        self.claims = claims or {}
+
+
+def make_claim(prop, target, is_qualifier=False):
+    return FakeClaim(prop, target)
+
+
+def copy_claim(claim):
+    return FakeClaim(
+        claim.prop, claim.target,
+        {prop: list(quals) for prop, quals in claim.qualifiers.items()},
+        [dict(source) for source in claim.sources])
+
+
+class TestEntityDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.stated_in = [FakeClaim("P248", "Q1")]
+        self.retrieved = [FakeClaim("P813", "2026-10-18")]
+
+    def make_diff(self, **item):
+        return EntityDiff(FakeItem(**item), make_claim, copy_claim)
+
+    def test_labels_on_empty_item(self):
+        diff = self.make_diff()
+        diff.add_labels({"sv": "Kyrka", "en": "Church"}, {"sv": ["Kapell"]})
+        self.assertEqual(diff.labels, {"sv": "Kyrka", "en": "Church"})
+        self.assertEqual(diff.aliases, {"sv": [
+            {"language": "sv", "value": "Kapell", "add": ""}]})
+
+    def test_labels_become_aliases(self):
+        diff = self.make_diff(labels={"sv": "Kyrka"},
+                              aliases={"sv": ["Gamla kyrkan"]})
+        diff.add_labels({"sv": "Kyrkan"},
+                        {"sv": ["kyrka", "gamla kyrkan", "Kapell"]})
+        self.assertEqual(diff.labels, {})
+        self.assertEqual(
+            [x["value"] for x in diff.aliases["sv"]], ["Kyrkan", "Kapell"])
+
+    def test_descriptions(self):
+        diff = self.make_diff(descriptions={"sv": "kyrka"})
+        diff.add_descriptions({"sv": "kapell", "en": "church", "fi": ""})
+        self.assertEqual(diff.descriptions, {"en": "church"})
+
+    def test_existing_value_same_qualifiers(self):
+        claim = FakeClaim("P31", "Q16970",
+                          qualifiers={"P642": [FakeClaim("P642", "Q2")]})
+        diff = self.make_diff(claims={"P31": [claim]})
+        diff.add_claim("P31", "Q16970", {"P642": "Q2"})
+        self.assertEqual(diff.get_data(), {})
+
+    def test_existing_value_other_qualifiers(self):
+        claim = FakeClaim("P31", "Q16970",
+                          qualifiers={"P642": [FakeClaim("P642", "Q2")]})
+        diff = self.make_diff(claims={"P31": [claim]})
+        diff.add_claim("P31", "Q16970", {"P642": "Q3"})
+        self.assertEqual(diff.get_data()["claims"], [{
+            "property": "P31", "value": "Q16970",
+            "qualifiers": {"P642": ["Q3"]}, "references": []}])
+
+    def test_value_without_qualifiers_matches_qualified_claim(self):
+        claim = FakeClaim("P31", "Q16970",
+                          qualifiers={"P642": [FakeClaim("P642", "Q2")]})
+        diff = self.make_diff(claims={"P31": [claim]})
+        diff.add_claim("P31", "Q16970")
+        self.assertEqual(diff.get_data(), {})
+
+    def test_qualifiers_added_to_unqualified_claim(self):
+        diff = self.make_diff(claims={"P31": [FakeClaim("P31", "Q16970")]})
+        diff.add_claim("P31", "Q16970", {"P642": "Q2"})
+        self.assertEqual(diff.get_data()["claims"], [{
+            "property": "P31", "value": "Q16970",
+            "qualifiers": {"P642": ["Q2"]}, "references": []}])
+
+    def test_reference_already_present(self):
+        claim = FakeClaim("P31", "Q16970", sources=[
+            {"P248": [FakeClaim("P248", "Q1")],
+             "P813": [FakeClaim("P813", "2017-01-01")]}])
+        diff = self.make_diff(claims={"P31": [claim]})
+        diff.add_claim("P31", "Q16970", source_test=self.stated_in,
+                       source_notest=self.retrieved)
+        self.assertEqual(diff.get_data(), {})
+
+    def test_reference_added_to_existing_claim(self):
+        claim = FakeClaim("P31", "Q16970", sources=[
+            {"P248": [FakeClaim("P248", "Q9")]}])
+        diff = self.make_diff(claims={"P31": [claim]})
+        diff.add_claim("P31", "Q16970", source_test=self.stated_in,
+                       source_notest=self.retrieved)
+        self.assertEqual(diff.get_data()["claims"], [{
+            "property": "P31", "value": "Q16970", "qualifiers": {},
+            "references": [{"P248": ["Q9"]},
+                           {"P248": ["Q1"], "P813": ["2026-10-18"]}]}])
+        # the item itself is left as it was
+        self.assertEqual(len(claim.sources), 1)
+
+    def test_new_value(self):
+        diff = self.make_diff(claims={"P31": [FakeClaim("P31", "Q16970")]})
+        diff.add_claim("P31", "Q811979", source_test=self.stated_in)
+        diff.add_claim("P17", "Q34")
+        self.assertEqual(
+            [(x["property"], x["value"]) for x in diff.get_data()["claims"]],
+            [("P31", "Q811979"), ("P17", "Q34")])
+        self.assertEqual([x.target for x in diff.get_claims("P31")],
+                         ["Q16970", "Q811979"])
+
+    def test_value_added_twice(self):
+        diff = self.make_diff()
+        diff.add_claim("P31", "Q16970")
+        diff.add_claim("P31", "Q16970", source_test=self.stated_in)
+        self.assertEqual(len(diff.get_data()["claims"]), 1)
+        self.assertEqual(diff.get_counts(), {
+            "labels": 0, "aliases": 0, "descriptions": 0, "claims": 1})
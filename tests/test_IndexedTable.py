@@ -0,0 +1,48 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import unittest
+import importer.importer_utils as utils
+from importer.IndexedTable import IndexedTable
+
+
+class TestIndexedTable(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [
+            {"item": "Q1", "sv": "Alby", "kommun": "Botkyrka"},
+            {"item": "Q2", "sv": "Alby", "kommun": "Ånge"},
+            {"item": "Q3", "sv": "Borlänge", "kommun": "Borlänge"}]
+        self.table = IndexedTable(self.rows)
+
+    def test_lookup(self):
+        self.assertEqual(self.table.lookup("sv", "Alby"), self.rows[:2])
+        self.assertEqual(self.table.lookup("sv", "Foo"), [])
+
+    def test_lookup_lowercase(self):
+        self.assertEqual(self.table.lookup("kommun", "ånge", lowercase=True),
+                         [self.rows[1]])
+        self.assertEqual(self.table.lookup("kommun", "ånge"), [])
+
+    def test_lookup_missing_field(self):
+        self.rows[2].pop("sv")
+        table = IndexedTable(self.rows)
+        with self.assertRaises(KeyError):
+            table.lookup("sv", "Alby")
+
+    def test_lookup_unhashable(self):
+        self.assertEqual(self.table.lookup("sv", ["Alby"]), [])
+
+    def test_modified(self):
+        self.table.lookup("sv", "Alby")
+        self.table.append({"item": "Q4", "sv": "Alby", "kommun": "Foo"})
+        self.assertEqual(len(self.table.lookup("sv", "Alby")), 3)
+
+    def test_get_item_from_dict_by_key(self):
+        for search_term in ("Alby", "Borlänge", "Foo"):
+            self.assertEqual(
+                utils.get_item_from_dict_by_key(
+                    dict_name=self.table, search_term=search_term,
+                    search_in="sv"),
+                utils.get_item_from_dict_by_key(
+                    dict_name=self.rows, search_term=search_term,
+                    search_in="sv"))
@@ -0,0 +1,30 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import unittest
+import importer.importer_utils as utils
+from importer.KeywordMatcher import KeywordMatcher
+
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.keywords = ["bro", "järnvägsbro", "kyrka", "gsbr", "kyrka",
+                         "kapell", "hus", "bad", "badhus"]
+        self.matcher = KeywordMatcher(self.keywords)
+
+    def test_find_keywords(self):
+        self.assertEqual(self.matcher.find_keywords("stora järnvägsbron"),
+                         {"bro", "järnvägsbro", "gsbr"})
+
+    def test_get_longest_match_same_as_utils(self):
+        for text in ("götaälvsbron", "stora järnvägsbron", "skogskapellet",
+                     "kyrka", "badhuset", "bad och hus", "", "foo"):
+            self.assertEqual(
+                self.matcher.get_longest_match(text),
+                utils.get_longest_match(text, self.keywords))
+
+    def test_get_longest_match_several(self):
+        self.assertEqual(self.matcher.get_longest_match("kyrkan"),
+                         ["kyrka", "kyrka"])
+        self.assertEqual(self.matcher.get_longest_match("bad och hus"),
+                         ["hus", "bad"])
@@ -0,0 +1,109 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import copy
+import unittest
+from importer.KnownItems import KnownItems
+
+
+def match_row(row, known):
+    """Match a row as Monument.find_matching_wikidata() does."""
+    item = known.get(row["value"])
+    if item:
+        return item, None
+    if row["item"] and known.has_item(row["item"]):
+        return row["item"], "item_conflict"
+    known[row["value"]] = row["item"]
+    return row["item"], None
+
+
+class TestKnownItems(unittest.TestCase):
+
+    def setUp(self):
+        self.known = KnownItems({"4420": "Q28936211", "2041": "Q28933898"})
+
+    def test_mapping(self):
+        self.assertEqual(self.known["4420"], "Q28936211")
+        self.assertIn("2041", self.known)
+        self.assertEqual(len(self.known), 2)
+        self.assertEqual(dict(self.known),
+                         {"4420": "Q28936211", "2041": "Q28933898"})
+
+    def test_has_item(self):
+        self.assertTrue(self.known.has_item("Q28936211"))
+        self.assertFalse(self.known.has_item("Q1"))
+
+    def test_add_value(self):
+        self.known["1234"] = "Q28936211"
+        self.assertEqual(self.known.get_values("Q28936211"), {"4420", "1234"})
+
+    def test_reassign_value(self):
+        self.known["4420"] = "Q1"
+        self.assertFalse(self.known.has_item("Q28936211"))
+        self.assertTrue(self.known.has_item("Q1"))
+        self.assertEqual(self.known.get_values("Q28936211"), set())
+
+    def test_delete_value(self):
+        del self.known["2041"]
+        self.assertNotIn("2041", self.known)
+        self.assertFalse(self.known.has_item("Q28933898"))
+
+    def test_record(self):
+        self.known.start_recording()
+        self.assertNotIn("1234", self.known)
+        self.assertTrue(self.known.has_item("Q28936211"))
+        self.known["1234"] = "Q1"
+        self.assertEqual(self.known.stop_recording(), {
+            "values": {"1234": (False, None)},
+            "items": {"Q28936211": True},
+            "added": [("1234", "Q1")]})
+        self.assertIsNone(self.known.record)
+
+    def test_merge(self):
+        worker = copy.deepcopy(self.known)
+        worker.start_recording()
+        match_row({"value": "1234", "item": "Q1"}, worker)
+        record = worker.stop_recording()
+        self.assertTrue(self.known.merge(record))
+        self.assertEqual(self.known["1234"], "Q1")
+
+    def test_merge_other_answers(self):
+        worker = copy.deepcopy(self.known)
+        worker.start_recording()
+        match_row({"value": "1234", "item": "Q1"}, worker)
+        record = worker.stop_recording()
+        # an earlier row in another worker matched the same item
+        self.known["5678"] = "Q1"
+        self.assertFalse(self.known.merge(record))
+        self.assertNotIn("1234", self.known)
+
+    def test_workers_same_output(self):
+        rows = [
+            {"value": "1", "item": "Q1"},
+            {"value": "2", "item": "Q2"},
+            {"value": "3", "item": "Q1"},  # same item as row 0
+            {"value": "1", "item": "Q5"},  # same value as row 0
+            {"value": "4", "item": "Q28936211"},  # already known
+            {"value": "5", "item": "Q2"},  # same item as row 1
+            {"value": "2", "item": None},  # same value as row 1
+            {"value": "6", "item": "Q6"},
+        ]
+        expected = [match_row(row, self.known) for row in rows]
+        for workers in (2, 3, 4):
+            known = KnownItems({"4420": "Q28936211", "2041": "Q28933898"})
+            # each worker process gets a copy, and a chunk of the rows
+            copies = [copy.deepcopy(known) for _ in range(workers)]
+            size = -(-len(rows) // workers)
+            records = []
+            for i, row in enumerate(rows):
+                worker = copies[i // size]
+                worker.start_recording()
+                records.append((match_row(row, worker),
+                                worker.stop_recording()))
+            # merged in the parent, in the order of the rows
+            output = []
+            for row, (result, record) in zip(rows, records):
+                if not known.merge(record):
+                    result = match_row(row, known)
+                output.append(result)
+            self.assertEqual(output, expected)
+            self.assertEqual(dict(known), dict(self.known))
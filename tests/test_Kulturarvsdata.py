@@ -0,0 +1,126 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from importer.Kulturarvsdata import Kulturarvsdata
+
+DOCUMENTS = {
+    "/raa/bbr/21300000003265": b"<html></html>",
+    "/raa/bbr/jsonld/21300000003265": json.dumps(
+        {"@graph": [{"hasPart": ["raa/bbr/21300000003266"]}]}).encode(),
+    "/raa/bbra/21320000019150": b"<html></html>",
+    "/raa/bbra/jsonld/21320000019150": b"not json",
+}
+UNAVAILABLE = ["/raa/bbr/21300000000001"]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves DOCUMENTS, fails UNAVAILABLE and counts the requests made."""
+
+    requests_made = []
+
+    def respond(self, send_body):
+        self.requests_made.append((self.command, self.path))
+        body = DOCUMENTS.get(self.path)
+        if self.path in UNAVAILABLE:
+            self.send_response(503)
+        else:
+            self.send_response(200 if body is not None else 404)
+        self.send_header("Content-Length", str(len(body or b"")))
+        self.end_headers()
+        if send_body and body:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.respond(False)
+
+    def do_GET(self):
+        self.respond(True)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestKulturarvsdata(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(("127.0.0.1", 0), StandInHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+        cls.base_url = "http://127.0.0.1:{}/".format(cls.server.server_port)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StandInHandler.requests_made = []
+        self.cache_dir = tempfile.mkdtemp()
+        self.client = Kulturarvsdata(base_url=self.base_url,
+                                     cache_dir=self.cache_dir, workers=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_get_bbr_link(self):
+        self.assertEqual(self.client.get_bbr_link("21320000019150"),
+                         "raa/bbra/21320000019150")
+        self.assertEqual(self.client.get_bbr_link("21300000003265"),
+                         "raa/bbr/21300000003265")
+        self.assertIsNone(self.client.get_bbr_link("1"))
+        self.assertTrue(all(command == "HEAD" for command, _
+                            in StandInHandler.requests_made))
+
+    def test_get_bbr_link_unavailable(self):
+        self.assertIsNone(self.client.get_bbr_link("21300000000001"))
+        made = len(StandInHandler.requests_made)
+        # not remembered, unlike a building that doesn't exist
+        self.assertIsNone(self.client.get_bbr_link("21300000000001"))
+        self.assertEqual(len(StandInHandler.requests_made), 2 * made)
+        self.client.get_bbr_link("1")
+        made = len(StandInHandler.requests_made)
+        self.client.get_bbr_link("1")
+        self.assertEqual(len(StandInHandler.requests_made), made)
+
+    def test_get_jsonld_cached(self):
+        expected = {"@graph": [{"hasPart": ["raa/bbr/21300000003266"]}]}
+        self.assertEqual(
+            self.client.get_jsonld("raa/bbr/21300000003265"), expected)
+        other = Kulturarvsdata(base_url=self.base_url,
+                               cache_dir=self.cache_dir)
+        self.assertEqual(other.get_jsonld("raa/bbr/21300000003265"), expected)
+        self.assertEqual(len(StandInHandler.requests_made), 1)
+
+    def test_get_jsonld_expired(self):
+        path = "raa/bbr/21300000003265"
+        self.client.get_jsonld(path)
+        filename = self.client.get_cache_filename(
+            self.client.make_url("raa/bbr/jsonld/21300000003265"))
+        stale = time.time() - self.client.ttl - 60
+        os.utime(filename, (stale, stale))
+        self.assertIsNotNone(self.client.get_jsonld(path))
+        self.assertEqual(len(StandInHandler.requests_made), 2)
+        # the new copy is cached again
+        self.client.get_jsonld(path)
+        self.assertEqual(len(StandInHandler.requests_made), 2)
+
+    def test_get_jsonld_invalid(self):
+        self.assertIsNone(self.client.get_jsonld("raa/bbra/21320000019150"))
+
+    def test_prefetch(self):
+        self.client.prefetch(["21300000003265", "21320000019150", "1"])
+        made = len(StandInHandler.requests_made)
+        self.assertEqual(self.client.get_bbr_link("21300000003265"),
+                         "raa/bbr/21300000003265")
+        self.assertIsNotNone(
+            self.client.get_jsonld("raa/bbr/21300000003265"))
+        self.assertEqual(len(StandInHandler.requests_made), made)
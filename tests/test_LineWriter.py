@@ -0,0 +1,32 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import os
+import shutil
+import tempfile
+import unittest
+from importer.LineWriter import LineWriter
+
+
+class TestLineWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "skipped.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_lines(self):
+        lines = ["Q1 | 1", "None | 2", "Q3 | ö"]
+        writer = LineWriter(self.filename)
+        for line in lines:
+            writer.write_line(line)
+        writer.close()
+        self.assertEqual(writer.count, 3)
+        with open(self.filename, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "\n".join(lines))
+
+    def test_nothing_written(self):
+        writer = LineWriter(self.filename)
+        writer.close()
+        self.assertFalse(os.path.exists(self.filename))
@@ -0,0 +1,51 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from importer.Logger import Logger
+
+
+class TestLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def read_lines(self, logger):
+        with open(logger.file_path, encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def test_buffered(self):
+        logger = Logger(flush_lines=2, flush_interval=60)
+        logger.logit("Q1 CREATE")
+        self.assertEqual(self.read_lines(logger), [])
+        logger.logit("Q1 ADDED CLAIM P31")
+        lines = self.read_lines(logger)
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].endswith("\tQ1 ADDED CLAIM P31"))
+        logger.close()
+
+    def test_close_flushes(self):
+        logger = Logger(flush_interval=60)
+        logger.logit("Q1 CREATE")
+        logger.close()
+        self.assertEqual(len(self.read_lines(logger)), 1)
+
+    def test_json_records_background(self):
+        logger = Logger(json_records=True, background=True)
+        for prop in ("P17", "P31"):
+            logger.logit("Q1 ADDED CLAIM " + prop, item="Q1",
+                         action="claim", property=prop)
+        logger.flush()
+        records = [json.loads(x) for x in self.read_lines(logger)]
+        self.assertEqual([x["property"] for x in records], ["P17", "P31"])
+        self.assertEqual(records[0]["item"], "Q1")
+        logger.close()
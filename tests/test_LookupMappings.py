@@ -0,0 +1,38 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import unittest
+import importer.importer_utils as utils
+from importer.LookupMappings import LookupMappings
+
+
+class TestLookupMappings(unittest.TestCase):
+
+    def setUp(self):
+        self.table = {
+            "Kyrka": {"count": "3", "items": ["Q16970"]},
+            "kyrka": {"count": "1", "items": ["Q1"]},
+            "Gravfält": {"count": "2", "items": []},
+            "Foo and Cat": {"count": "1", "items": ["Q8888", "Q1234"]}}
+        self.mappings = LookupMappings(self.table)
+
+    def test_get_items(self):
+        self.assertEqual(self.mappings.get_items("foo and cat"),
+                         ["Q8888", "Q1234"])
+        self.assertEqual(self.mappings.get_items("gravfält"), [])
+        self.assertIsNone(self.mappings.get_items("bbb"))
+
+    def test_get_items_first_label_wins(self):
+        self.assertEqual(self.mappings.get_items("kyrka"), ["Q16970"])
+
+    def test_get_items_modified(self):
+        self.mappings.get_items("kyrka")
+        del self.mappings["Kyrka"]
+        self.mappings["Borg"] = {"count": "1", "items": ["Q2"]}
+        self.assertEqual(self.mappings.get_items("kyrka"), ["Q1"])
+        self.assertEqual(self.mappings.get_items("borg"), ["Q2"])
+
+    def test_get_items_by_label(self):
+        for value in ("kyrka", "gravfält", "foo and cat", "bbb", "Kyrka"):
+            self.assertEqual(
+                utils.get_items_by_label(value, self.mappings),
+                utils.get_items_by_label(value, self.table))
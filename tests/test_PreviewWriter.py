@@ -0,0 +1,41 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import os
+import shutil
+import tempfile
+import unittest
+from importer.PreviewWriter import PreviewWriter
+
+
+class TestPreviewWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "examples.wiki")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, filename):
+        with open(filename, encoding="utf-8") as f:
+            return f.read()
+
+    def test_write_monument(self):
+        writer = PreviewWriter(self.filename)
+        writer.write_monument("<pre>1</pre>", "{|\n|}")
+        writer.write_monument("<pre>2</pre>", "{|\n|}")
+        writer.close()
+        self.assertEqual(writer.filenames, [self.filename])
+        self.assertEqual(self.read(self.filename),
+                         "<pre>1</pre>\n{|\n|}\n<pre>2</pre>\n{|\n|}\n")
+
+    def test_sharded(self):
+        writer = PreviewWriter(self.filename, shard_size=2)
+        for i in range(5):
+            writer.write_monument(str(i))
+        writer.close()
+        self.assertEqual(
+            [os.path.basename(x) for x in writer.filenames],
+            ["examples_1.wiki", "examples_2.wiki", "examples_3.wiki"])
+        self.assertEqual(self.read(writer.filenames[1]), "2\n3\n")
+        self.assertEqual(self.read(writer.filenames[2]), "4\n")
@@ -0,0 +1,56 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import importer.importer_utils as utils
+from importer.ReportWriter import ReportWriter
+
+
+class TestReportWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "report.json")
+        self.reports = [
+            {"Q": "", "wlm_id": "1", "report": {"typ": "Kyrka"}},
+            {"Q": "Q1", "wlm_id": "2", "changed": datetime.date(2017, 1, 2),
+             "report": {"kommun": ["Ånge", "Foo"]}}]
+        self.writer = ReportWriter(
+            self.filename, default=utils.datetime_convert, sync_every=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_jsonl_written_before_close(self):
+        for report in self.reports:
+            self.writer.write(report)
+        with open(os.path.join(self.directory, "report.jsonl")) as f:
+            self.assertEqual(len(f.readlines()), 2)
+        self.writer.close()
+
+    def test_finalize_same_as_json_to_file(self):
+        for report in self.reports:
+            self.writer.write(report)
+        self.writer.finalize()
+        expected_filename = os.path.join(self.directory, "expected.json")
+        utils.json_to_file(expected_filename, self.reports, silent=True)
+        with open(self.filename, encoding="utf-8") as f, \
+                open(expected_filename, encoding="utf-8") as expected:
+            self.assertEqual(f.read(), expected.read())
+        self.assertFalse(
+            os.path.exists(os.path.join(self.directory, "report.jsonl")))
+
+    def test_finalize_nothing_written(self):
+        self.writer.finalize()
+        self.assertFalse(os.path.exists(self.filename))
+        self.assertEqual(self.writer.count, 0)
+
+    def test_finalize_loads(self):
+        self.writer.write(self.reports[0])
+        self.writer.finalize()
+        with open(self.filename, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), [self.reports[0]])
@@ -0,0 +1,36 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import os
+import shutil
+import tempfile
+import unittest
+from importer.SqliteDatabase import SqliteDatabase
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS things (name TEXT PRIMARY KEY)"
+
+
+class TestSqliteDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "things.sqlite")
+        self.database = SqliteDatabase(self.filename, SCHEMA)
+
+    def tearDown(self):
+        self.database.close()
+        shutil.rmtree(self.directory)
+
+    def test_schema_created(self):
+        self.assertIsNone(self.database.fetchone("SELECT name FROM things"))
+
+    def test_execute_fetchone(self):
+        self.database.execute("INSERT INTO things VALUES (?)", ("a",))
+        other = SqliteDatabase(self.filename, SCHEMA)
+        self.assertEqual(other.fetchone("SELECT name FROM things"), ("a",))
+        other.close()
+
+    def test_new_connection_in_other_process(self):
+        connection = self.database.connect()
+        self.database.pid = -1  # as if forked
+        self.assertIsNot(self.database.connect(), connection)
+        connection.close()
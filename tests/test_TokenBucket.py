@@ -0,0 +1,38 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import time
+import unittest
+from importer.TokenBucket import TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_take_waits_for_tokens(self):
+        bucket = TokenBucket(600)  # one token per 0.1 s
+        start = time.monotonic()
+        for _ in range(4):
+            bucket.take()
+        # the first token is in the full bucket
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+
+    def test_unlimited(self):
+        bucket = TokenBucket(None)
+        start = time.monotonic()
+        for _ in range(1000):
+            bucket.take()
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_charge_delays_next_take(self):
+        bucket = TokenBucket(600)
+        bucket.take()
+        bucket.charge(2)
+        start = time.monotonic()
+        bucket.take()
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+
+    def test_pause(self):
+        bucket = TokenBucket(None)
+        bucket.pause(0.2)
+        start = time.monotonic()
+        bucket.take()
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
@@ -0,0 +1,133 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import os
+import shutil
+import tempfile
+import unittest
+from importer.UploadJournal import UploadJournal
+
+
+class TestUploadJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "upload_journal.sqlite")
+        self.journal = UploadJournal(self.filename, "monuments_se-bbr_(sv)",
+                                     "2026-10-18_12:00:00")
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.directory)
+
+    def test_get_missing(self):
+        self.assertIsNone(self.journal.get("1"))
+
+    def test_upload_states(self):
+        self.journal.start("1", "abc")
+        self.assertEqual(self.journal.get("1")["state"], "started")
+        self.journal.created("1", "Q123")
+        self.assertEqual(self.journal.get("1")["qid"], "Q123")
+        self.journal.done("1", "Q123", 1)
+        self.assertEqual(self.journal.get("1"), {
+            "state": "done", "qid": "Q123", "edits": 1, "hash": "abc",
+            "run_id": "2026-10-18_12:00:00", "created_qid": "Q123"})
+
+    def test_restart_keeps_created_item(self):
+        self.journal.start("1", "abc")
+        self.journal.created("1", "Q123")
+        self.journal.start("1", "def")
+        entry = self.journal.get("1")
+        self.assertEqual(entry["state"], "started")
+        self.assertEqual(entry["qid"], "Q123")
+        self.assertEqual(entry["hash"], "def")
+
+    def test_persistent_per_dataset(self):
+        self.journal.start("1", "abc")
+        self.journal.done("1", "Q123", 3)
+        self.journal.close()
+        reopened = UploadJournal(self.filename, "monuments_se-bbr_(sv)")
+        other = UploadJournal(self.filename, "monuments_dk-bygninger_(da)")
+        self.assertEqual(reopened.get("1")["qid"], "Q123")
+        self.assertIsNone(other.get("1"))
+        reopened.close()
+        other.close()
+
+    def test_make_hash(self):
+        first = {"labels": {"sv": "Kyrka", "en": "Church"}, "wd-item": None}
+        second = {"wd-item": None, "labels": {"en": "Church", "sv": "Kyrka"}}
+        self.assertEqual(self.journal.make_hash(first),
+                         self.journal.make_hash(second))
+        second["labels"]["en"] = "Chapel"
+        self.assertNotEqual(self.journal.make_hash(first),
+                            self.journal.make_hash(second))
+
+    def make_wd_item(self, retrieved="2026-10-18"):
+        return {
+            "wd-item": None,
+            "labels": {"sv": "Kyrka"},
+            "statements": {"P1435": [{
+                "value": "Q24284073",
+                "quals": {},
+                "refs": [{
+                    "source": {"prop": "P248", "value": "Q1"},
+                    "published": {"prop": "P813", "value": retrieved},
+                    "reference_url": {"prop": "P854",
+                                      "value": "http://kulturarvsdata.se/"}
+                }]}]}}
+
+    def test_make_hash_ignores_retrieved(self):
+        self.assertEqual(
+            self.journal.make_hash(self.make_wd_item("2026-10-18")),
+            self.journal.make_hash(self.make_wd_item("2026-10-19")))
+        changed = self.make_wd_item()
+        changed["statements"]["P1435"][0]["refs"][0]["source"]["value"] = "Q2"
+        self.assertNotEqual(self.journal.make_hash(self.make_wd_item()),
+                            self.journal.make_hash(changed))
+
+    def test_start_upload_new(self):
+        self.assertEqual(self.journal.start_upload("1", self.make_wd_item()),
+                         ("new", None))
+        self.assertEqual(self.journal.get("1")["state"], "started")
+
+    def test_start_upload_empty_id(self):
+        with self.assertRaises(ValueError):
+            self.journal.start_upload("", self.make_wd_item())
+        self.assertIsNone(self.journal.get(""))
+
+    def test_start_upload_unchanged(self):
+        self.journal.start_upload("1", self.make_wd_item())
+        self.journal.created("1", "Q123")
+        self.journal.done("1", "Q123", 2)
+        # only the retrieval date differs
+        wd_item = self.make_wd_item("2026-10-19")
+        self.assertEqual(self.journal.start_upload("1", wd_item),
+                         ("unchanged", "Q123"))
+        self.assertEqual(self.journal.get("1")["state"], "done")
+        self.assertEqual(self.journal.start_upload("1", wd_item, force=True),
+                         ("unchanged", None))
+        self.assertEqual(self.journal.get("1")["state"], "started")
+        self.assertEqual(wd_item["wd-item"], "Q123")
+
+    def test_start_upload_changed(self):
+        self.journal.start_upload("1", self.make_wd_item())
+        self.journal.done("1", "Q123", 2)
+        wd_item = self.make_wd_item()
+        wd_item["labels"]["sv"] = "Kapell"
+        self.assertEqual(self.journal.start_upload("1", wd_item),
+                         ("changed", None))
+        # the item was matched, not created, by the previous upload
+        self.assertIsNone(wd_item["wd-item"])
+        self.journal.created("1", "Q456")
+        self.journal.done("1", "Q456", 1)
+        wd_item["labels"]["sv"] = "Kyrka"
+        self.journal.start_upload("1", wd_item)
+        self.assertEqual(wd_item["wd-item"], "Q456")
+
+    def test_start_upload_unfinished(self):
+        self.journal.start_upload("1", self.make_wd_item())
+        self.journal.created("1", "Q123")
+        wd_item = self.make_wd_item()
+        self.assertEqual(self.journal.start_upload("1", wd_item),
+                         ("changed", None))
+        # the item created before is edited instead of creating another
+        self.assertEqual(wd_item["wd-item"], "Q123")
@@ -0,0 +1,103 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+import threading
+import time
+import unittest
+from importer.TokenBucket import TokenBucket
+from importer.UploadScheduler import UploadScheduler
+
+
+class MaxlagError(Exception):
+    """Stand-in for an API error of a lagged server."""
+
+    code = "maxlag"
+
+
+class StandInUploader(object):
+    """Upload session recording the monuments uploaded."""
+
+    def __init__(self, uploaded, failures=None):
+        self.uploaded = uploaded
+        self.failures = failures or {}
+        self.edit_count = 0
+
+    def upload(self, monument):
+        if self.failures.get(monument):
+            error = self.failures[monument].pop(0)
+            raise error
+        self.uploaded.append(monument)
+        self.edit_count += 2
+        return "Q{}".format(monument)
+
+
+class TestUploadScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.uploaded = []
+        self.results = []
+        self.sessions = []
+        self.failures = {}
+
+    def make_uploader(self):
+        uploader = StandInUploader(self.uploaded, self.failures)
+        self.sessions.append(uploader)
+        return uploader
+
+    def make_scheduler(self, workers=1):
+        scheduler = UploadScheduler(
+            self.make_uploader, TokenBucket(None), workers,
+            backoff_base=0.01)
+        self.addCleanup(scheduler.close)
+        return scheduler
+
+    def test_upload_all(self):
+        scheduler = self.make_scheduler(workers=3)
+        for monument in range(20):
+            scheduler.submit(monument, self.results.append)
+        scheduler.join()
+        self.assertEqual(sorted(self.uploaded), list(range(20)))
+        self.assertEqual(sorted(self.results),
+                         sorted("Q{}".format(x) for x in range(20)))
+        self.assertEqual(scheduler.uploaded, 20)
+        self.assertEqual(scheduler.edits, 40)
+        self.assertLessEqual(len(self.sessions), 3)
+
+    def test_retry_throttled(self):
+        self.failures[1] = [MaxlagError(), MaxlagError()]
+        scheduler = self.make_scheduler()
+        scheduler.submit(1, self.results.append)
+        scheduler.join()
+        self.assertEqual(self.results, ["Q1"])
+
+    def test_error_raised_in_submitting_thread(self):
+        self.failures[1] = [ValueError("bad data")]
+        scheduler = self.make_scheduler()
+        scheduler.submit(1)
+        with self.assertRaises(ValueError):
+            scheduler.join()
+        with self.assertRaises(ValueError):
+            scheduler.submit(2)
+
+    def test_callbacks_one_at_a_time(self):
+        running = []
+        overlaps = []
+        lock = threading.Lock()
+
+        def callback(result):
+            with lock:
+                running.append(result)
+                overlaps.append(len(running) > 1)
+            time.sleep(0.001)
+            with lock:
+                running.remove(result)
+
+        scheduler = self.make_scheduler(workers=4)
+        for monument in range(50):
+            scheduler.submit(monument, callback)
+        scheduler.join()
+        self.assertEqual(len(overlaps), 50)
+        self.assertFalse(any(overlaps))
+
+    def test_no_workers(self):
+        with self.assertRaises(ValueError):
+            self.make_scheduler(workers=0)
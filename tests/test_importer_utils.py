@@ -1,7 +1,11 @@
 #!/usr/bin/python
 # -*- coding: utf-8  -*-
+import datetime
+import os
 import pywikibot
+import shutil
 import string
+import tempfile
 import unittest
 import importer.importer_utils as utils
 
@@ -88,6 +92,78 @@ class TestDictionaryMethods(unittest.TestCase):
             search_term, self.lookup_table), output)
 
 
+class TestPagepropsQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.query = {
+            "normalized": [{"from": "tegera Arena", "to": "Tegera Arena"}],
+            "redirects": [{"from": "Tegera Arena", "to": "Tegera Arena AB"}],
+            "pages": [
+                {"ns": 0, "title": "Tegera Arena AB",
+                 "pageprops": {"wikibase_item": "Q7694875"}},
+                {"ns": 0, "title": "Moviken",
+                 "pageprops": {"disambiguation": "",
+                               "wikibase_item": "Q10601419"}},
+                {"ns": 0, "title": "Foobar", "missing": True},
+                {"ns": 0, "title": "Svanesund"},
+                {"ns": 2, "title": "Användare:Foo"},
+                {"title": "Foo{}", "invalid": True}]
+        }
+
+    def parse(self, title):
+        results = utils.parse_pageprops_query([title], self.query)
+        return results.get(title, "unresolved")
+
+    def test_parse_pageprops_query_normalized_redirect(self):
+        self.assertEqual(self.parse("tegera Arena"), ("Q7694875", None))
+
+    def test_parse_pageprops_query_disambig(self):
+        self.assertEqual(self.parse("Moviken"), (None, None))
+
+    def test_parse_pageprops_query_missing(self):
+        self.assertEqual(self.parse("Foobar"), (None, None))
+
+    def test_parse_pageprops_query_no_item(self):
+        self.assertEqual(self.parse("Svanesund"), (None, "Svanesund"))
+
+    def test_parse_pageprops_query_not_mainspace(self):
+        self.assertEqual(self.parse("Användare:Foo"), (None, None))
+
+    def test_parse_pageprops_query_unresolved(self):
+        self.assertEqual(self.parse("Foo{}"), "unresolved")
+        self.assertEqual(self.parse("en:Foo"), "unresolved")
+
+
+class TestEntityClaims(unittest.TestCase):
+
+    def snak(self, datatype, value=None, snaktype="value"):
+        snak = {"snaktype": snaktype, "datatype": datatype}
+        if value is not None:
+            snak["datavalue"] = {"value": value}
+        return {"mainsnak": snak}
+
+    def test_parse_entity_claims_item(self):
+        claims = {"P31": [self.snak("wikibase-item",
+                                    {"entity-type": "item", "id": "Q5"}),
+                          self.snak("wikibase-item", snaktype="somevalue")]}
+        self.assertEqual(utils.parse_entity_claims(claims),
+                         {"P31": ["Q5", None]})
+
+    def test_parse_entity_claims_string(self):
+        claims = {"P1260": [self.snak("external-id", "raa/bbr/1")],
+                  "P856": [self.snak("url", "http://example.com")]}
+        self.assertEqual(utils.parse_entity_claims(claims),
+                         {"P1260": ["raa/bbr/1"],
+                          "P856": ["http://example.com"]})
+
+    def test_parse_entity_claims_uncacheable(self):
+        claims = {"P18": [self.snak("commonsMedia", "Foo.jpg")],
+                  "P625": [self.snak("globe-coordinate",
+                                     {"latitude": 1, "longitude": 2})]}
+        self.assertEqual(utils.parse_entity_claims(claims),
+                         {"P18": None, "P625": None})
+
+
 class TestStringMethods(unittest.TestCase):
 
     def test_contains_digit(self):
@@ -360,6 +436,17 @@ class TestWikitext(unittest.TestCase):
         text = "[[Tranås]] and also [[Svanesund]]"
         self.assertEqual(utils.count_wikilinks(text), 2)
 
+    def test_clean_page_title_wikilink(self):
+        text = "[[Tegera Arena|Arenan]]"
+        self.assertEqual(utils.clean_page_title(text), "Tegera Arena")
+
+    def test_clean_page_title_linebreak(self):
+        text = "Tegera\nArena "
+        self.assertEqual(utils.clean_page_title(text), "Tegera Arena")
+
+    def test_clean_page_title_empty(self):
+        self.assertIsNone(utils.clean_page_title("[[]]"))
+
     def test_string_is_q_item_pass(self):
         self.assertTrue(utils.string_is_q_item("Q1641992"))
 
@@ -506,6 +593,63 @@ class TestMisc(unittest.TestCase):
         self.assertTrue(utils.is_valid_url(url))
 
 
+class TestQueries(unittest.TestCase):
+
+    def test_make_query(self):
+        self.assertEqual(utils.make_query("monuments_se", None),
+                         "select DISTINCT * from `monuments_se`")
+        self.assertEqual(
+            utils.make_query("monuments_se", 10, since="2026-10-01"),
+            "select DISTINCT * from `monuments_se` WHERE `changed` > %s "
+            "LIMIT 10, 18446744073709551615;")
+
+    def test_make_keyset_query(self):
+        self.assertEqual(
+            utils.make_keyset_query("monuments_se", "id", None, 100),
+            "select DISTINCT * from `monuments_se` ORDER BY `id` LIMIT 100")
+        self.assertEqual(
+            utils.make_keyset_query("monuments_se", "id", 5, 100,
+                                    since="2026-10-01"),
+            "select DISTINCT * from `monuments_se` WHERE `id` > %s AND "
+            "`changed` > %s ORDER BY `id` LIMIT 100")
+
+    def test_make_sample_query(self):
+        self.assertEqual(
+            utils.make_sample_query("monuments_se", 5, 42, "id",
+                                    since="2026-10-01"),
+            "select * from (select DISTINCT * from `monuments_se` WHERE "
+            "`changed` > %s) as distinct_rows "
+            "ORDER BY MD5(CONCAT(42, '-', `id`)) LIMIT 5")
+
+    def test_make_last_change_query(self):
+        self.assertEqual(utils.make_last_change_query("monuments_se"),
+                         "SELECT MAX(`changed`) AS last_change "
+                         "FROM `monuments_se`")
+
+
+class TestWatermark(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "watermark.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_load_missing(self):
+        self.assertIsNone(utils.load_watermark(self.filename))
+
+    def test_save_and_load(self):
+        changed = datetime.datetime(2026, 10, 18, 12, 30)
+        utils.save_watermark(self.filename, changed)
+        self.assertEqual(utils.load_watermark(self.filename),
+                         "2026-10-18 12:30:00")
+        utils.save_watermark(self.filename, "2026-10-19 08:00:00")
+        self.assertEqual(utils.load_watermark(self.filename),
+                         "2026-10-19 08:00:00")
+        self.assertEqual(os.listdir(self.directory), ["watermark.json"])
+
+
 class TestCommons(unittest.TestCase):
 
     def test_file_is_on_commons_pass(self):